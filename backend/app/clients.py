@@ -0,0 +1,60 @@
+# backend/app/clients.py
+"""
+Shared, pooled network clients created once at import and reused by every request.
+"""
+
+import os
+import logging
+import httpx
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 200))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 20))
+# Short selection/connect timeouts so an unreachable DB fails the import-time ping in ~2s, not 30s
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 2000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 2000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 10000))
+
+# Single MongoClient for the whole process (database.py and scheduler.py share it)
+mongo_client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    retryWrites=True,
+    appname="freshlense"
+)
+
+# Keep-alive HTTP client for the Resend REST API (avoids a TCP+TLS handshake per email)
+RESEND_API_URL = "https://api.resend.com"
+resend_http_client = httpx.AsyncClient(
+    base_url=RESEND_API_URL,
+    timeout=10,
+    headers={"Authorization": f"Bearer {os.getenv('RESEND_API_KEY', '')}"}
+)
+
+
+def warm_clients() -> bool:
+    """Open pooled connections up front so the first request doesn't pay for the handshake"""
+    try:
+        mongo_client.admin.command("ping")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to warm MongoDB connection pool: {e}")
+        return False
+
+
+async def close_clients():
+    """Close pooled HTTP clients on shutdown"""
+    try:
+        await resend_http_client.aclose()
+    except Exception as e:
+        logger.error(f"Error closing Resend HTTP client: {e}")
@@ -0,0 +1,13 @@
+# backend/app/config.py
+"""
+Settings shared by modules that shouldn't have to import database.py (and connect to MongoDB) to read them.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Password hashing - each +1 in cost doubles the work: ~50ms at 10, ~200ms at 12, ~400ms at 13.
+# Existing hashes keep verifying at the cost they were created with.
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", 12))
@@ -1,27 +1,42 @@
 # backend/app/database.py
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import DuplicateKeyError, ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError, ConnectionFailure, ServerSelectionTimeoutError, PyMongoError, OperationFailure
 from datetime import datetime, timedelta
 import os
 import hashlib
+import logging
+import threading
+from functools import cache, lru_cache
 from typing import List, Dict, Any, Optional
 from bson import ObjectId
-from passlib.context import CryptContext
+from bson.errors import InvalidId
 from dotenv import load_dotenv
+from cachetools import TTLCache
+
+from .clients import mongo_client
+from .config import BCRYPT_COST
 
 # Load environment variables
 load_dotenv()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Password hashing (cost: see config.BCRYPT_COST) - built on first use so importing database.py
+# doesn't load passlib/bcrypt
+@cache
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_COST)
+
+# Audit log entries older than this are expired by MongoDB's TTL monitor
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", 90))
 
 # MongoDB connection - UPDATED FOR ATLAS
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 client = None
 db = None
 
 try:
-    client = MongoClient(MONGO_URI)
+    client = mongo_client  # ✅ Shared pooled client (see clients.py)
     client.admin.command('ping')  # Test the connection
     print("✅ MongoDB connection successful!")
     db = client['freshlense']  # Note: Your DB name is 'freshlense' (from your code)
@@ -36,12 +51,18 @@ try:
     audit_logs_collection = db['audit_logs']
 
     # Indexes
+    def _drop_legacy_index(collection, name: str):
+        """Drop an index that newer compound indexes have made redundant, on deployments that still have it"""
+        if name in collection.index_information():
+            collection.drop_index(name)
+    
     def create_indexes():
         # Users indexes - SAFE VERSION (NO TTL!)
-        users_collection.create_index([("email", ASCENDING)], unique=True)
+        users_collection.create_index([("email", ASCENDING)], unique=True, background=True)
         users_collection.create_index([("created_at", DESCENDING)])
         users_collection.create_index([("mfa_code_expires", ASCENDING)])
         users_collection.create_index([("is_deleted", ASCENDING)])
+        users_collection.create_index([("is_deleted", ASCENDING), ("email", ASCENDING)])
         users_collection.create_index([("mfa_verified_at", ASCENDING)])  # ✅ NEW: For MFA session queries
         users_collection.create_index([("mfa_session_token", ASCENDING)])  # ✅ NEW: For MFA session lookups
         users_collection.create_index([("display_name", ASCENDING)])  # ✅ NEW: For profile queries
@@ -49,13 +70,26 @@ try:
         # Pages indexes
         pages_collection.create_index([("user_id", ASCENDING), ("url", ASCENDING)], unique=True)
         pages_collection.create_index([("user_id", ASCENDING), ("is_active", ASCENDING)])
+        # ✅ Supports the scheduler's due-pages query (equality on is_active, range on next_check_at);
+        # the old (is_active, last_checked) index served the previous last_checked-based query and is unused
+        _drop_legacy_index(pages_collection, "is_active_1_last_checked_1")
+        pages_collection.create_index([("is_active", ASCENDING), ("next_check_at", ASCENDING)])
         
         # ✅ ENHANCED: Versions indexes for smart versioning and AI summaries
-        versions_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
         versions_collection.create_index([("page_id", ASCENDING), ("change_significance_score", DESCENDING)])
         versions_collection.create_index([("page_id", ASCENDING), ("checksum", ASCENDING)])
         versions_collection.create_index([("page_id", ASCENDING), ("content_hash", ASCENDING)])
         versions_collection.create_index([("change_significance_score", DESCENDING)])
+        # ✅ Equality-Sort-Range order for the filtered versions list (page_id, sort by timestamp, score >= x)
+        versions_collection.create_index([
+            ("page_id", ASCENDING), ("timestamp", DESCENDING), ("change_significance_score", DESCENDING)
+        ])
+        # ✅ Covers the scheduler's "latest checksum for page X" read without loading the version body;
+        # its (page_id, timestamp) prefix serves the per-page timeline queries the old two-field index did
+        versions_collection.create_index([
+            ("page_id", ASCENDING), ("timestamp", DESCENDING), ("checksum", ASCENDING), ("content_hash", ASCENDING)
+        ], name="latest_cksum_cov")
+        _drop_legacy_index(versions_collection, "page_id_1_timestamp_-1")
         
         # ✅ NEW: Indexes for AI summary queries
         versions_collection.create_index([("page_id", ASCENDING), ("ai_summary", ASCENDING)])
@@ -66,18 +100,46 @@ try:
         changes_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
         
         # Indexes for password reset tokens
-        password_reset_tokens_collection.create_index([("token", ASCENDING)], unique=True)
+        # ✅ Tokens are stored hashed (token_hash); drop the legacy plaintext index so
+        # new documents without a "token" field don't collide on null
+        if "token_1" in password_reset_tokens_collection.index_information():
+            password_reset_tokens_collection.drop_index("token_1")
+        password_reset_tokens_collection.create_index([("token_hash", ASCENDING)], unique=True)
         password_reset_tokens_collection.create_index([("user_id", ASCENDING)])
         password_reset_tokens_collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
         
-        # Audit logs indexes
-        audit_logs_collection.create_index([("timestamp", DESCENDING)])
-        audit_logs_collection.create_index([("user_id", ASCENDING)])
-        audit_logs_collection.create_index([("operation", ASCENDING)])
+        # Audit logs indexes - the timestamp index doubles as a TTL, so old entries expire server-side
+        audit_ttl_seconds = AUDIT_RETENTION_DAYS * 24 * 3600
+        try:
+            audit_logs_collection.create_index([("timestamp", DESCENDING)], expireAfterSeconds=audit_ttl_seconds)
+        except OperationFailure:
+            # Deployments that already have the plain timestamp index: turn it into a TTL index in place
+            try:
+                db.command("collMod", "audit_logs", index={
+                    "keyPattern": {"timestamp": -1}, "expireAfterSeconds": audit_ttl_seconds
+                })
+            except OperationFailure:
+                # collMod can't add a TTL to an existing index before MongoDB 5.1 - rebuild it instead
+                try:
+                    audit_logs_collection.drop_index("timestamp_-1")
+                    audit_logs_collection.create_index(
+                        [("timestamp", DESCENDING)], expireAfterSeconds=audit_ttl_seconds
+                    )
+                except OperationFailure:
+                    logger.warning(
+                        "Could not make the audit_logs timestamp index a TTL index; "
+                        "old entries need cleanup_old_audit_logs()", exc_info=True
+                    )
+        # ✅ Equality-then-sort compounds for the per-user and per-operation audit queries;
+        # they cover the old single-field user_id/operation indexes as prefixes
+        _drop_legacy_index(audit_logs_collection, "user_id_1")
+        _drop_legacy_index(audit_logs_collection, "operation_1")
+        audit_logs_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+        audit_logs_collection.create_index([("operation", ASCENDING), ("timestamp", DESCENDING)])
         
         print("✅ Database indexes created successfully with SMART VERSIONING and AI SUPPORT!")
 
-    create_indexes()
+    # create_indexes() runs from the app's startup hook, not at import
 
 except (ConnectionFailure, ServerSelectionTimeoutError) as e:
     print(f"❌ MongoDB connection failed: {e}")
@@ -90,19 +152,61 @@ def is_db_available():
     return db is not None
 
 
+@lru_cache(maxsize=4096)
+def to_oid(value: str) -> ObjectId:
+    """Parse a hex id string once; ObjectIds are immutable so repeat ids reuse the same object"""
+    return ObjectId(value)
+
+
+# ✅ Short-lived cache of serialized page lists (keyed by user), dropped on page/version writes
+pages_list_cache = TTLCache(maxsize=1024, ttl=15)
+pages_list_cache_lock = threading.Lock()  # TTLCache isn't thread-safe; sync handlers run in a threadpool
+
+
+def invalidate_pages_cache():
+    """Drop cached page lists after a page or version write"""
+    with pages_list_cache_lock:
+        pages_list_cache.clear()
+
+
+# ✅ Recent "user exists and isn't deleted" answers, so per-page checks skip a users round trip
+_user_alive_cache = TTLCache(maxsize=10_000, ttl=60)
+_user_alive_cache_lock = threading.Lock()
+
+
+def user_is_alive(user_id: ObjectId) -> bool:
+    """True if the user exists and isn't soft-deleted (cached for up to a minute)"""
+    with _user_alive_cache_lock:
+        cached = _user_alive_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    alive = users_collection.find_one({"_id": user_id, "is_deleted": False}, {"_id": 1}) is not None
+    with _user_alive_cache_lock:
+        _user_alive_cache[user_id] = alive
+    return alive
+
+
+def forget_user_alive(user_id: ObjectId):
+    """Drop a cached liveness answer after the user is deleted"""
+    with _user_alive_cache_lock:
+        _user_alive_cache.pop(user_id, None)
+
+
 def doc_to_dict(doc):
-    """Convert MongoDB ObjectIds -> str recursively"""
+    """Convert MongoDB ObjectIds -> str in place (iterative walk - no recursion or per-level copies)"""
     if doc is None:
         return None
     if "_id" in doc:
         doc["_id"] = str(doc["_id"])
-    for key, value in list(doc.items()):
-        if isinstance(value, ObjectId):
-            doc[key] = str(value)
-        elif isinstance(value, dict):
-            doc[key] = doc_to_dict(value)
-        elif isinstance(value, list):
-            doc[key] = [doc_to_dict(v) if isinstance(v, dict) else str(v) if isinstance(v, ObjectId) else v for v in value]
+    stack = [doc]
+    while stack:
+        node = stack.pop()
+        for key, value in (node.items() if isinstance(node, dict) else enumerate(node)):
+            if isinstance(value, ObjectId):
+                node[key] = str(value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
     return doc
 
 
@@ -140,7 +244,7 @@ def get_user_by_email(email: str):
         return None
     user = users_collection.find_one({
         "email": email,
-        "is_deleted": {"$ne": True}
+        "is_deleted": False
     })
     return user
 
@@ -151,10 +255,10 @@ def get_user_by_id(user_id):
         return None
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         user = users_collection.find_one({
             "_id": user_id,
-            "is_deleted": {"$ne": True}
+            "is_deleted": False
         })
         return user
     except Exception as e:
@@ -163,11 +267,12 @@ def get_user_by_id(user_id):
 
 
 def create_user(user_data: dict):
-    """Create a new user with hashed password and MFA DISABLED by default"""
+    """Create a new user with hashed password and MFA DISABLED by default.
+    Raises DuplicateKeyError if the email is already registered."""
     if db is None:
         return None
     
-    hashed_password = pwd_context.hash(user_data.get('password', ''))
+    hashed_password = _pwd_context().hash(user_data.get('password', ''))
     
     user_doc = {
         "email": user_data.get('email'),
@@ -199,8 +304,8 @@ def create_user(user_data: dict):
         user_doc["_id"] = result.inserted_id
         return user_doc
     except DuplicateKeyError:
-        print(f"User with email {user_data.get('email')} already exists")
-        return None
+        # ✅ Let callers map this to "Email already registered" - the unique email index is the existence check
+        raise
     except Exception as e:
         print(f"Error creating user: {e}")
         return None
@@ -213,10 +318,10 @@ def soft_delete_user(user_id: str, deleted_by: str = "system", reason: str = "")
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
-            {"_id": user_id, "is_deleted": {"$ne": True}},
+            {"_id": user_id, "is_deleted": False},
             {
                 "$set": {
                     "is_deleted": True,
@@ -228,6 +333,7 @@ def soft_delete_user(user_id: str, deleted_by: str = "system", reason: str = "")
         )
         
         if result.modified_count > 0:
+            forget_user_alive(user_id)
             log_audit_event(
                 operation="USER_SOFT_DELETED",
                 user_id=str(user_id),
@@ -244,7 +350,7 @@ def soft_delete_user(user_id: str, deleted_by: str = "system", reason: str = "")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 # ---------------- User Profile Management (NEW) ----------------
@@ -255,10 +361,10 @@ def update_user_profile(user_id, display_name: str) -> bool:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
-            {"_id": user_id, "is_deleted": {"$ne": True}},
+            {"_id": user_id, "is_deleted": False},
             {"$set": {"display_name": display_name, "updated_at": datetime.utcnow()}}
         )
         return result.modified_count > 0
@@ -274,10 +380,10 @@ def update_user_password_hash(user_id, hashed_password: str) -> bool:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
-            {"_id": user_id, "is_deleted": {"$ne": True}},
+            {"_id": user_id, "is_deleted": False},
             {"$set": {"hashed_password": hashed_password, "updated_at": datetime.utcnow()}}
         )
         return result.modified_count > 0
@@ -293,10 +399,10 @@ def update_notification_settings(user_id, notification_prefs: dict) -> bool:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
-            {"_id": user_id, "is_deleted": {"$ne": True}},
+            {"_id": user_id, "is_deleted": False},
             {"$set": {"notification_preferences": notification_prefs, "updated_at": datetime.utcnow()}}
         )
         return result.modified_count > 0
@@ -312,7 +418,7 @@ def delete_user_account(user_id) -> bool:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         # 1. Delete all tracked pages for this user
         pages = pages_collection.find({"user_id": user_id})
@@ -334,6 +440,7 @@ def delete_user_account(user_id) -> bool:
         
         # 5. Finally, delete the user
         result = users_collection.delete_one({"_id": user_id})
+        forget_user_alive(user_id)
         
         if result.deleted_count > 0:
             log_audit_event(
@@ -358,10 +465,10 @@ def get_user_settings(user_id):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         user = users_collection.find_one(
-            {"_id": user_id, "is_deleted": {"$ne": True}},
+            {"_id": user_id, "is_deleted": False},
             {"notification_preferences": 1, "mfa_enabled": 1}
         )
         return user
@@ -378,12 +485,12 @@ def get_user_mfa_status(user_id):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         user = users_collection.find_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "email": 1,
@@ -408,14 +515,14 @@ def update_user_mfa_status(user_id, update_data: dict):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         update_data["updated_at"] = datetime.utcnow()
         
         result = users_collection.update_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {"$set": update_data}
         )
@@ -432,12 +539,12 @@ def update_user_mfa_code(user_id, mfa_code: str, expires_at: datetime):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "$set": {
@@ -460,12 +567,12 @@ def clear_user_mfa_code(user_id):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "$set": {
@@ -490,12 +597,12 @@ def update_user_mfa_session(user_id, mfa_verified_at: datetime, mfa_session_toke
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "$set": {
@@ -518,12 +625,12 @@ def clear_user_mfa_session(user_id) -> bool:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         result = users_collection.update_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "$set": {
@@ -546,12 +653,12 @@ def get_user_mfa_session(user_id):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         user = users_collection.find_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "mfa_verified_at": 1,
@@ -572,12 +679,12 @@ def is_mfa_session_valid(user_id, mfa_session_token: str = None) -> tuple:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         user = users_collection.find_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "mfa_verified_at": 1,
@@ -632,7 +739,7 @@ def get_valid_mfa_sessions() -> list:
             {
                 "mfa_verified_at": {"$ne": None},
                 "mfa_session_token": {"$ne": None},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "email": 1,
@@ -673,7 +780,7 @@ def cleanup_expired_mfa_sessions() -> int:
             {
                 "mfa_verified_at": {"$lt": cutoff_time},
                 "mfa_verified_at": {"$ne": None},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "$set": {
@@ -700,12 +807,12 @@ def verify_user_mfa_code(user_id, input_code: str):
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = to_oid(user_id)
         
         user = users_collection.find_one(
             {
                 "_id": user_id,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {"mfa_code": 1, "mfa_code_expires": 1, "mfa_enabled": 1}
         )
@@ -745,7 +852,7 @@ def get_users_with_mfa_enabled():
         users = users_collection.find(
             {
                 "mfa_enabled": True,
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {"email": 1, "mfa_email": 1, "mfa_setup_completed": 1, "created_at": 1}
         )
@@ -765,7 +872,7 @@ def get_expired_mfa_codes():
             {
                 "mfa_code": {"$ne": None},
                 "mfa_code_expires": {"$lt": datetime.utcnow()},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {"email": 1, "mfa_code_expires": 1}
         )
@@ -776,6 +883,11 @@ def get_expired_mfa_codes():
 
 
 # ---------------- Password Reset Token Operations ----------------
+def hash_reset_token(token: str) -> bytes:
+    """Hash a password reset token for storage/lookup (plaintext is never stored)"""
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+
+
 def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datetime) -> bool:
     """Create a new password reset token - CHECK USER NOT DELETED"""
     if db is None:
@@ -784,19 +896,20 @@ def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datet
     if isinstance(user_id, str):
         try:
             user_id = ObjectId(user_id)
-        except:
+        except (InvalidId, TypeError):
             return False
     
     user = users_collection.find_one({
         "_id": user_id,
-        "is_deleted": {"$ne": True}
+        "is_deleted": False
     })
     
     if not user:
         return False
     
+    # _id is left as the default ObjectId, which is already time-ordered
     token_doc = {
-        "token": token,
+        "token_hash": hash_reset_token(token),
         "user_id": user_id,
         "created_at": datetime.utcnow(),
         "expires_at": expires_at,
@@ -821,7 +934,7 @@ def get_valid_password_reset_token(token: str):
     
     try:
         token_record = password_reset_tokens_collection.find_one({
-            "token": token,
+            "token_hash": hash_reset_token(token),
             "used": False,
             "expires_at": {"$gt": datetime.utcnow()}
         })
@@ -838,7 +951,7 @@ def mark_password_reset_token_used(token: str) -> bool:
     
     try:
         result = password_reset_tokens_collection.update_one(
-            {"token": token},
+            {"token_hash": hash_reset_token(token)},
             {
                 "$set": {
                     "used": True,
@@ -860,18 +973,18 @@ def update_user_password(user_id: ObjectId, new_password: str) -> bool:
     if isinstance(user_id, str):
         try:
             user_id = ObjectId(user_id)
-        except:
+        except (InvalidId, TypeError):
             return False
     
     user = users_collection.find_one({
         "_id": user_id,
-        "is_deleted": {"$ne": True}
+        "is_deleted": False
     })
     
     if not user:
         return False
     
-    hashed_password = pwd_context.hash(new_password)
+    hashed_password = _pwd_context().hash(new_password)
     
     try:
         result = users_collection.update_one(
@@ -896,14 +1009,9 @@ def get_tracked_pages(user_id, active_only: bool = True):
         return []
     
     if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
+        user_id = to_oid(user_id)
     
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
-    
-    if not user:
+    if not user_is_alive(user_id):
         return []
     
     query = {"user_id": user_id}
@@ -920,7 +1028,8 @@ def get_tracked_page(page_id: str):
     try:
         page = pages_collection.find_one({"_id": ObjectId(page_id)})
         return page
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("get_tracked_page failed", exc_info=True)
         return None
 
 
@@ -930,14 +1039,9 @@ def create_tracked_page(page_data: dict, user_id):
         return None
     
     if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
+        user_id = to_oid(user_id)
     
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
-    
-    if not user:
+    if not user_is_alive(user_id):
         return None
     
     # ✅ ADDED: Default versioning configuration
@@ -951,6 +1055,8 @@ def create_tracked_page(page_data: dict, user_id):
         "last_checked": None,
         "last_change_detected": None,
         "current_version_id": None,
+        "version_count": 0,
+        "significant_version_count": 0,
         # ✅ SMART VERSIONING CONFIG
         "versioning_config": {
             "min_change_threshold": 0.05,
@@ -965,6 +1071,7 @@ def create_tracked_page(page_data: dict, user_id):
     try:
         result = pages_collection.insert_one(page_doc)
         page_doc["_id"] = result.inserted_id
+        invalidate_pages_cache()
         return page_doc
     except DuplicateKeyError:
         return None
@@ -977,12 +1084,17 @@ def update_tracked_page(page_id: str, update_data: dict) -> bool:
     
     update_data_copy = update_data.copy()
     if "current_version_id" in update_data_copy and isinstance(update_data_copy["current_version_id"], str):
-        update_data_copy["current_version_id"] = ObjectId(update_data_copy["current_version_id"])
+        update_data_copy["current_version_id"] = to_oid(update_data_copy["current_version_id"])
+    if "check_interval_minutes" in update_data_copy:
+        # New interval - make the page due now so the scheduler re-plans it
+        update_data_copy.setdefault("next_check_at", None)
     
     try:
         result = pages_collection.update_one({"_id": ObjectId(page_id)}, {"$set": update_data_copy})
+        invalidate_pages_cache()
         return result.modified_count > 0
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("update_tracked_page failed", exc_info=True)
         return False
 
 
@@ -992,8 +1104,10 @@ def delete_tracked_page(page_id: str) -> bool:
         return False
     try:
         result = pages_collection.delete_one({"_id": ObjectId(page_id)})
+        invalidate_pages_cache()
         return result.deleted_count > 0
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("delete_tracked_page failed", exc_info=True)
         return False
 
 
@@ -1005,15 +1119,10 @@ def get_tracked_page_by_url(url: str, user_id):
     if isinstance(user_id, str):
         try:
             user_id = ObjectId(user_id)
-        except:
+        except (InvalidId, TypeError):
             return None
     
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
-    
-    if not user:
+    if not user_is_alive(user_id):
         return None
 
     try:
@@ -1030,14 +1139,9 @@ def get_user_page_count(user_id: str) -> int:
     
     try:
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
-        
-        user = users_collection.find_one({
-            "_id": user_id,
-            "is_deleted": {"$ne": True}
-        })
+            user_id = to_oid(user_id)
         
-        if not user:
+        if not user_is_alive(user_id):
             return 0
         
         count = pages_collection.count_documents({"user_id": user_id})
@@ -1048,6 +1152,58 @@ def get_user_page_count(user_id: str) -> int:
 
 
 # ---------------- Page Versions - UPDATED FOR SMART VERSIONING AND AI SUMMARIES ----------------
+def adjust_page_version_counts(page_id, delta: int, significant_delta: int = 0,
+                               content_sha256: Optional[str] = None) -> None:
+    """Keep the denormalized version counters (and latest content hash) on the page document in sync"""
+    if db is None:
+        return
+    
+    update = {"$inc": {"version_count": delta, "significant_version_count": significant_delta}}
+    if content_sha256:
+        update["$set"] = {"last_content_sha256": content_sha256}
+    try:
+        pages_collection.update_one({"_id": ObjectId(page_id)}, update)
+    except Exception as e:
+        print(f"Error updating version counts for page {page_id}: {e}")
+
+
+def backfill_page_version_counts() -> int:
+    """One-time migration: populate version_count / significant_version_count on pages missing them"""
+    if db is None:
+        return 0
+    
+    try:
+        counts = versions_collection.aggregate([
+            {"$group": {
+                "_id": "$page_id",
+                "count": {"$sum": 1},
+                "significant": {"$sum": {"$cond": [{"$gte": ["$change_significance_score", 0.3]}, 1, 0]}}
+            }}
+        ])
+        operations = [
+            UpdateOne(
+                {"_id": d["_id"], "version_count": {"$exists": False}},
+                {"$set": {"version_count": d["count"], "significant_version_count": d["significant"]}}
+            )
+            for d in counts
+        ]
+        updated = pages_collection.bulk_write(operations, ordered=False).modified_count if operations else 0
+        
+        # Pages that have no versions at all
+        result = pages_collection.update_many(
+            {"version_count": {"$exists": False}},
+            {"$set": {"version_count": 0, "significant_version_count": 0}}
+        )
+        updated += result.modified_count
+        
+        if updated > 0:
+            print(f"✅ Backfilled version counts on {updated} pages")
+        return updated
+    except Exception as e:
+        print(f"Error backfilling page version counts: {e}")
+        return 0
+
+
 def create_page_version(
     page_id: str, 
     text_content: str, 
@@ -1072,6 +1228,10 @@ def create_page_version(
         print(f"⚠️  Duplicate content detected for page {page_id}. Skipping version creation.")
         return duplicate
     
+    # Measure once - both metric blocks below reuse these
+    content_length = len(text_content) if text_content else 0
+    word_count = len(text_content.split()) if text_content else 0
+    
     version = {
         "page_id": ObjectId(page_id),
         "timestamp": datetime.utcnow(),
@@ -1083,8 +1243,8 @@ def create_page_version(
         "checksum": checksum,
         "change_significance_score": significance_score,
         "change_metrics": change_metrics or {
-            "content_length": len(text_content),
-            "word_count": len(text_content.split()) if text_content else 0,
+            "content_length": content_length,
+            "word_count": word_count,
             "similarity_score": 100.0,
             "change_percentage": 0.0
         },
@@ -1094,8 +1254,8 @@ def create_page_version(
         
         "metadata": {
             "url": url,
-            "content_length": len(text_content),
-            "word_count": len(text_content.split()) if text_content else 0,
+            "content_length": content_length,
+            "word_count": word_count,
             "html_content_length": len(html_content) if html_content else 0,
             "fetched_at": datetime.utcnow().isoformat(),
             "store_reason": "significant_change" if significance_score >= 0.3 else "first_version",
@@ -1106,6 +1266,8 @@ def create_page_version(
     try:
         result = versions_collection.insert_one(version)
         version["_id"] = result.inserted_id
+        adjust_page_version_counts(page_id, 1, 1 if significance_score >= 0.3 else 0, content_sha256=content_hash)
+        invalidate_pages_cache()
         
         summary_status = "with AI summary" if ai_summary else "without AI summary"
         print(f"✅ Created version {version['_id']} for page {page_id} {summary_status} (significance: {significance_score})")
@@ -1281,13 +1443,18 @@ def prune_old_versions(page_id: str, keep_count: int = 50, keep_significant: boo
         
         # Delete old versions
         deleted_count = 0
+        significant_deleted = 0
         for version in all_versions:
             version_id = str(version["_id"])
             if version_id not in versions_to_keep:
                 versions_collection.delete_one({"_id": version["_id"]})
                 deleted_count += 1
+                if version.get("change_significance_score", 0) >= 0.3:
+                    significant_deleted += 1
         
         if deleted_count > 0:
+            adjust_page_version_counts(page_id, -deleted_count, -significant_deleted)
+            invalidate_pages_cache()
             print(f"✅ Pruned {deleted_count} old versions for page {page_id}")
         
         return deleted_count
@@ -1343,9 +1510,9 @@ def create_change_log(change_data: dict):
     change_data_copy = change_data.copy()
     
     if "page_id" in change_data_copy and isinstance(change_data_copy["page_id"], str):
-        change_data_copy["page_id"] = ObjectId(change_data_copy["page_id"])
+        change_data_copy["page_id"] = to_oid(change_data_copy["page_id"])
     if "user_id" in change_data_copy and isinstance(change_data_copy["user_id"], str):
-        change_data_copy["user_id"] = ObjectId(change_data_copy["user_id"])
+        change_data_copy["user_id"] = to_oid(change_data_copy["user_id"])
     
     if "timestamp" not in change_data_copy:
         change_data_copy["timestamp"] = datetime.utcnow()
@@ -1353,7 +1520,8 @@ def create_change_log(change_data: dict):
     try:
         result = changes_collection.insert_one(change_data_copy)
         return str(result.inserted_id)
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("create_change_log failed", exc_info=True)
         return None
 
 
@@ -1364,7 +1532,8 @@ def get_change_logs_for_page(page_id: str, limit: int = 20):
     try:
         changes = changes_collection.find({"page_id": ObjectId(page_id)}).sort("timestamp", DESCENDING).limit(limit)
         return list(changes)
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("get_change_logs_for_page failed", exc_info=True)
         return []
 
 
@@ -1374,20 +1543,16 @@ def get_change_logs_for_user(user_id, limit: int = 20):
         return []
     
     if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
+        user_id = to_oid(user_id)
     
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
-    
-    if not user:
+    if not user_is_alive(user_id):
         return []
     
     try:
         changes = changes_collection.find({"user_id": user_id}).sort("timestamp", DESCENDING).limit(limit)
         return list(changes)
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("get_change_logs_for_user failed", exc_info=True)
         return []
 
 
@@ -1399,25 +1564,31 @@ def get_all_active_pages():
     try:
         pages = pages_collection.find({"is_active": True})
         return list(pages)
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("get_all_active_pages failed", exc_info=True)
         return []
 
 
+def due_pages_query(now: datetime) -> Dict[str, Any]:
+    """Active pages whose next_check_at has passed, or that have none yet (new or never checked)"""
+    return {
+        "is_active": True,
+        "$or": [
+            {"next_check_at": {"$lte": now}},
+            {"next_check_at": None}
+        ]
+    }
+
+
 def get_pages_due_for_check():
     """Get pages that are due for checking based on their interval"""
     if db is None:
         return []
     try:
-        now = datetime.utcnow()
-        pages = pages_collection.find({
-            "is_active": True,
-            "$or": [
-                {"last_checked": None},
-                {"last_checked": {"$lte": now}}
-            ]
-        })
+        pages = pages_collection.find(due_pages_query(datetime.utcnow()))
         return list(pages)
-    except:
+    except (PyMongoError, InvalidId, TypeError):
+        logger.warning("get_pages_due_for_check failed", exc_info=True)
         return []
 
 
@@ -1432,7 +1603,7 @@ def cleanup_expired_mfa_codes():
             {
                 "mfa_code": {"$ne": None},
                 "mfa_code_expires": {"$lt": datetime.utcnow()},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             },
             {
                 "$set": {
@@ -1452,6 +1623,54 @@ def cleanup_expired_mfa_codes():
         return 0
 
 
+def migrate_mfa_code_expires_to_date() -> int:
+    """One-time migration: convert string mfa_code_expires values to native BSON dates"""
+    if db is None:
+        return 0
+    
+    try:
+        result = users_collection.update_many(
+            {"mfa_code_expires": {"$type": "string"}},
+            [{
+                "$set": {
+                    # Unparseable values become None - the user simply requests a new code
+                    "mfa_code_expires": {
+                        "$dateFromString": {"dateString": "$mfa_code_expires", "onError": None}
+                    }
+                }
+            }]
+        )
+        
+        if result.modified_count > 0:
+            print(f"✅ Migrated {result.modified_count} string mfa_code_expires values to dates")
+        
+        return result.modified_count
+    except Exception as e:
+        print(f"Error migrating mfa_code_expires: {e}")
+        return 0
+
+
+def migrate_is_deleted_flags() -> int:
+    """One-time migration: give every user an explicit is_deleted flag so live-user
+    queries can use an indexed {"is_deleted": False} equality instead of $ne"""
+    if db is None:
+        return 0
+    
+    try:
+        result = users_collection.update_many(
+            {"is_deleted": {"$nin": [True, False]}},  # missing or null
+            {"$set": {"is_deleted": False}}
+        )
+        
+        if result.modified_count > 0:
+            print(f"✅ Set is_deleted=False on {result.modified_count} users")
+        
+        return result.modified_count
+    except Exception as e:
+        print(f"Error migrating is_deleted flags: {e}")
+        return 0
+
+
 # ---------------- Audit Logging ----------------
 def log_audit_event(operation: str, user_id: str, performed_by: str = "system", details: str = "", ip_address: str = None):
     """Log audit events for tracking user operations"""
@@ -1511,15 +1730,15 @@ def check_database_health():
     try:
         client.admin.command('ping')
         
-        user_count = users_collection.count_documents({"is_deleted": {"$ne": True}})
+        user_count = users_collection.count_documents({"is_deleted": False})
         deleted_user_count = users_collection.count_documents({"is_deleted": True})
         page_count = pages_collection.count_documents({})
-        mfa_enabled_count = users_collection.count_documents({"mfa_enabled": True, "is_deleted": {"$ne": True}})
+        mfa_enabled_count = users_collection.count_documents({"mfa_enabled": True, "is_deleted": False})
         
         # MFA session stats
         active_mfa_sessions = users_collection.count_documents({
             "mfa_verified_at": {"$ne": None},
-            "is_deleted": {"$ne": True}
+            "is_deleted": False
         })
         
         # Version statistics with AI summaries
@@ -1,14 +1,24 @@
 # backend/app/main.py
 from fastapi import FastAPI, HTTPException, Depends, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 from bson import ObjectId
 import asyncio
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 
+# ✅ orjson is optional (only requirements-prod.txt pins it) - ORJSONResponse fails at render time without it
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 # ✅ Load environment variables
 from dotenv import load_dotenv
 import os
@@ -18,13 +28,27 @@ load_dotenv()
 # Configure logging - REDUCED VERBOSITY
 # ================================================
 
+# ✅ ADDED: Handlers run on a QueueListener thread so request handlers never block on stdout/file I/O
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def _queued(handlers):
+    """Wrap handlers behind a QueueHandler and return (queue_handler, listener)"""
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Final formatting happens in the listener
+    return queue_handler, QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+console_handler = logging.StreamHandler()  # Console handler
+app_log_handler = logging.FileHandler('app.log', mode='a')  # File handler for detailed logs
+for _handler in (console_handler, app_log_handler):
+    _handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+root_queue_handler, root_log_listener = _queued([console_handler, app_log_handler])
+
 logging.basicConfig(
     level=logging.WARNING,  # Only show WARNING and above in console
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Console handler
-        logging.FileHandler('app.log', mode='a')  # File handler for detailed logs
-    ]
+    format=LOG_FORMAT,
+    handlers=[root_queue_handler]
 )
 
 # Set specific loggers to appropriate levels
@@ -46,13 +70,17 @@ logging.getLogger("app.utils").setLevel(logging.WARNING)
 # File handler for detailed logs (DEBUG level in file only)
 file_handler = logging.FileHandler('detailed.log')
 file_handler.setLevel(logging.DEBUG)
-file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+file_formatter = logging.Formatter(LOG_FORMAT)
 file_handler.setFormatter(file_formatter)
+detailed_queue_handler, detailed_log_listener = _queued([file_handler])
 
 # Add file handler to specific loggers for detailed debugging
-logging.getLogger("app").addHandler(file_handler)
-logging.getLogger("app.scheduler").addHandler(file_handler)
-logging.getLogger("app.ai_service").addHandler(file_handler)
+logging.getLogger("app").addHandler(detailed_queue_handler)
+logging.getLogger("app.scheduler").addHandler(detailed_queue_handler)
+logging.getLogger("app.ai_service").addHandler(detailed_queue_handler)
+
+root_log_listener.start()
+detailed_log_listener.start()
 
 # Create logger for this module
 logger = logging.getLogger(__name__)
@@ -233,11 +261,28 @@ async def lifespan(app: FastAPI):
     # Check AI configuration
     ai_configured = check_ai_configuration()
     
+    # Warm pooled clients so the first request doesn't pay for connection setup
+    from .clients import warm_clients
+    if await asyncio.to_thread(warm_clients):
+        print("Connection pools: WARM")
+    
     # Check database connection
-    from .database import is_db_available
+    from .database import (
+        is_db_available, migrate_mfa_code_expires_to_date, migrate_is_deleted_flags, backfill_page_version_counts
+    )
     if is_db_available():
         print("Database connection: ACTIVE")
         
+        # Index builds happen here rather than at import so module import never blocks on them
+        from .database import create_indexes
+        await asyncio.to_thread(create_indexes)
+        
+        # One-time data fixes: MFA code expiry must be a native date, users carry an explicit
+        # is_deleted flag, pages carry version counters
+        migrate_mfa_code_expires_to_date()
+        migrate_is_deleted_flags()
+        backfill_page_version_counts()
+        
         # Set up versioning service collections
         db = get_db()
         versioning_service.set_collections(
@@ -289,13 +334,23 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error during monitoring_scheduler.shutdown(): {e}")
         print("=" * 60)
+        # Write out buffered audit entries while the DB client and log listeners are still up
+        # (atexit would be too late - they'd go through the retry backoff into the spill file, unlogged)
+        from .services.audit_service import audit_service
+        await asyncio.to_thread(audit_service.flush)
+        from .clients import close_clients
+        await close_clients()
+        # Flush any queued log records before the process exits
+        root_log_listener.stop()
+        detailed_log_listener.stop()
 
 # -------------------- Create FastAPI app --------------------
 app = FastAPI(
     title="FreshLense API",
     description="API for web content monitoring platform with AI-powered summaries",
     version="1.1.0",  # Updated version
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultResponse  # ✅ orjson when installed: much faster on wide version/diff lists
 )
 
 # ================================================
@@ -345,12 +400,9 @@ async def get_my_pages(current_user = Depends(get_current_user)):
     logger.debug(f"Fetching pages for user: {user_email}")
     pages_list = get_tracked_pages(user_id)
     
-    # Add version count to each page
-    db = get_db()
+    # Version count is denormalized on the page document (kept in sync with $inc)
     for page in pages_list:
-        page['version_count'] = db.page_versions.count_documents(
-            {"page_id": ObjectId(page['_id'])}
-        )
+        page.setdefault('version_count', 0)
     
     logger.debug(f"Found {len(pages_list)} pages for {user_email}")
     return [normalize_doc(p) for p in pages_list]
@@ -444,11 +496,8 @@ async def get_page(page_id: str, current_user = Depends(get_current_user)):
     if not page or str(page["user_id"]) != user_id:
         raise HTTPException(status_code=404, detail="Page not found")
     
-    # Add version count
-    db = get_db()
-    page['version_count'] = db.page_versions.count_documents(
-        {"page_id": ObjectId(page_id)}
-    )
+    # Version count is denormalized on the page document (kept in sync with $inc)
+    page.setdefault('version_count', 0)
     
     return normalize_doc(page)
 
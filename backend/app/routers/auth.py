@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
 from datetime import datetime, timedelta
+import asyncio
 import secrets
 import os
 import logging
 from typing import Optional, Dict, Any
+from pymongo.errors import DuplicateKeyError
 
 from ..database import (
     get_user_by_email, 
@@ -30,7 +32,9 @@ from ..schemas.auth import (
     User,
     UserCreate,
     UserLogin,
-    MFASessionCheckRequest  # Add this new schema
+    MFASessionCheckRequest,  # Add this new schema
+    EmailBody,
+    TokenBody
 )
 from ..services.mfa_service import mfa_service
 from ..services.email_service import send_mfa_email, send_mfa_setup_email, send_reset_email
@@ -38,11 +42,11 @@ from ..services.email_service import send_mfa_email, send_mfa_setup_email, send_
 # Import your JWT utilities
 from ..utils.security import (
     create_access_token,
-    verify_password,
-    get_password_hash,
+    verify_password_async,
     get_token_expiry_info,
     is_token_valid,
-    decode_access_token
+    decode_access_token,
+    entropy_pool
 )
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
@@ -100,16 +104,11 @@ async def debug_token_test():
 # TOKEN VALIDATION ENDPOINT
 # -------------------------------
 @router.post("/validate-token")
-async def validate_token(token: Dict[str, str]):
+async def validate_token(token: TokenBody):
     """
     Validate if a token is still valid.
     """
-    token_str = token.get("token")
-    if not token_str:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Token is required"
-        )
+    token_str = token.token
     
     # Check if token is valid
     if is_token_valid(token_str):
@@ -140,26 +139,26 @@ async def register(user_data: UserCreate):
     Register a new user. MFA is disabled by default.
     User will need to go through MFA during login.
     """
-    # Check if user already exists
-    existing_user = get_user_by_email(user_data.email)
-    if existing_user:
+    # ✅ Create user WITH MFA DISABLED BY DEFAULT
+    # The unique index on users.email rejects duplicates, so no separate existence check is needed
+    try:
+        # Hashing happens inside create_user, so keep it off the event loop
+        user = await asyncio.to_thread(create_user, {
+            "email": user_data.email,
+            "password": user_data.password,
+            "mfa_enabled": False,
+            "mfa_email": user_data.email,
+            "mfa_setup_completed": False,
+            "mfa_verified_at": None,  # Track when MFA was last verified
+            "mfa_session_token": None  # Track MFA session token
+        })
+    except DuplicateKeyError:
         logger.warning(f"Registration attempted for existing email: {user_data.email}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # ✅ Create user WITH MFA DISABLED BY DEFAULT
-    user = create_user({
-        "email": user_data.email,
-        "password": user_data.password,
-        "mfa_enabled": False,
-        "mfa_email": user_data.email,
-        "mfa_setup_completed": False,
-        "mfa_verified_at": None,  # Track when MFA was last verified
-        "mfa_session_token": None  # Track MFA session token
-    })
-    
     if not user:
         logger.error(f"Failed to create user: {user_data.email}")
         raise HTTPException(
@@ -196,7 +195,7 @@ async def login(user_credentials: UserLogin, background_tasks: BackgroundTasks):
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user["hashed_password"]):
+    if not await verify_password_async(user_credentials.password, user["hashed_password"]):
         logger.warning(f"Invalid password for user: {user['email']}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -217,7 +216,7 @@ async def login(user_credentials: UserLogin, background_tasks: BackgroundTasks):
         if mfa_verified_at and (datetime.utcnow() - mfa_verified_at) < timedelta(hours=24):
             # MFA session is still valid, create token directly
             access_token = create_access_token(data={"sub": user["email"]})
-            logger.info(f"User {user['email']} logged in using valid MFA session")
+            logger.debug("login via MFA session email=%s", user['email'])
             return {
                 "access_token": access_token,
                 "token_type": "bearer",
@@ -225,11 +224,11 @@ async def login(user_credentials: UserLogin, background_tasks: BackgroundTasks):
                 "message": "Login successful (MFA session valid)"
             }
     
-    # Require MFA - Send code in background (doesn't block response)
-    logger.debug(f"MFA required for user: {user['email']}")
+    # Require MFA - store the code now (single update), send the email in background
+    logger.debug("login MFA required email=%s", user['email'])
     
-    # Send MFA code in background - THIS IS THE FIX
-    background_tasks.add_task(send_mfa_code_to_user, user)
+    mfa_code = issue_mfa_code(user)
+    background_tasks.add_task(send_mfa_code_email, user, mfa_code)
     
     # ✅ Return MFA required response immediately (email sends in background)
     return {
@@ -242,22 +241,17 @@ async def login(user_credentials: UserLogin, background_tasks: BackgroundTasks):
 # Send MFA Code Endpoint - UPDATED with BackgroundTasks
 # -------------------------------
 @router.post("/send-mfa-code")
-async def send_mfa_code(request: Dict[str, str], background_tasks: BackgroundTasks):
+async def send_mfa_code(request: EmailBody, background_tasks: BackgroundTasks):
     """
     Send MFA code to user's email in the background.
     Can be used for login or during MFA setup.
     """
-    email = request.get("email")
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email is required"
-        )
+    email = request.email
     
     user = get_user_by_email(email)
     if not user:
         # Return success even if user doesn't exist for security
-        logger.debug(f"MFA code requested for non-existent user: {email}")
+        logger.debug("send-mfa-code unknown email=%s", email)
         return {"message": "If the email exists, a verification code has been sent"}
     
     # Send MFA code in background - THIS IS THE FIX
@@ -289,17 +283,10 @@ async def verify_mfa_code(request: MFAVerifyRequest):
             detail="Invalid credentials"
         )
     
-    # Get stored MFA code and expiry
+    # Get stored MFA code and expiry (stored as a native BSON date, so no parsing needed)
     stored_code = user.get("mfa_code")
     expires_at = user.get("mfa_code_expires")
     
-    # Convert string to datetime if needed
-    if expires_at and isinstance(expires_at, str):
-        try:
-            expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-        except ValueError:
-            expires_at = None
-    
     # Validate code
     is_valid, error_message = mfa_service.is_code_valid(stored_code, mfa_code, expires_at)
     
@@ -325,7 +312,7 @@ async def verify_mfa_code(request: MFAVerifyRequest):
             mfa_session_token=mfa_session_token
         )
         
-        logger.info(f"MFA session created for user: {user['email']} (valid for 24 hours)")
+        logger.debug("MFA session created email=%s ttl=24h", user['email'])
     
     # Create access token
     access_token = create_access_token(data={"sub": user["email"]})
@@ -337,9 +324,13 @@ async def verify_mfa_code(request: MFAVerifyRequest):
     if not token_info['valid']:
         logger.error(f"CRITICAL: Token invalid immediately after creation for user: {user['email']}")
     
-    # Log successful MFA verification
-    logger.info(f"MFA verification successful for user: {user['email']}")
-    
+    # Log successful MFA verification (debug only - keeps the hot path free of formatting/I/O)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "MFA verified user=%s exp=%s remaining=%.0fs",
+            user['email'], token_info.get('expires_at'), token_info.get('time_remaining_seconds') or 0
+        )
+
     response_data = {
         "access_token": access_token,
         "token_type": "bearer",
@@ -402,19 +393,19 @@ async def forgot_password(request: ForgotPasswordRequest):
     Initiate password reset process.
     Always returns success to prevent email enumeration attacks.
     """
-    logger.debug(f"Forgot password requested for: {request.email}")
+    logger.debug("forgot-password email=%s", request.email)
     
     user = get_user_by_email(request.email)
     
     # Always return success to prevent email enumeration
     if not user:
-        logger.debug(f"Password reset requested for non-existent email: {request.email}")
+        logger.debug("forgot-password unknown email=%s", request.email)
         return ForgotPasswordResponse(
             message="If the email exists, a reset link has been sent"
         )
     
     # Generate reset token
-    reset_token = secrets.token_urlsafe(32)
+    reset_token = entropy_pool.take(32)
     expires_at = datetime.utcnow() + timedelta(hours=1)  # Token valid for 1 hour
     
     # Save token to database
@@ -425,7 +416,7 @@ async def forgot_password(request: ForgotPasswordRequest):
     )
     
     if not token_created:
-        logger.error(f"Failed to create password reset token for user: {user['email']}")
+        logger.error("Failed to create password reset token for user: %s", user['email'])
         # Still return success for security
         return ForgotPasswordResponse(
             message="If the email exists, a reset link has been sent"
@@ -434,9 +425,9 @@ async def forgot_password(request: ForgotPasswordRequest):
     # Send reset email
     try:
         result = await send_reset_email(user["email"], reset_token, user["email"])
-        logger.info(f"Password reset email sent to: {user['email']}")
+        logger.debug("forgot-password reset email sent email=%s", user['email'])
     except Exception as e:
-        logger.error(f"Failed to send reset email to {user['email']}: {str(e)}")
+        logger.error("Failed to send reset email to %s: %s", user['email'], e)
         # Still return success for security
     
     return ForgotPasswordResponse(
@@ -462,7 +453,8 @@ async def reset_password(request: ResetPasswordRequest):
         )
     
     # Update user password
-    password_updated = update_user_password(
+    password_updated = await asyncio.to_thread(
+        update_user_password,
         user_id=token_record["user_id"],
         new_password=request.new_password
     )
@@ -547,16 +539,11 @@ async def setup_mfa(request: MFASetupRequest, background_tasks: BackgroundTasks)
     }
 
 @router.post("/disable-mfa")
-async def disable_mfa(request: Dict[str, str]):
+async def disable_mfa(request: EmailBody):
     """
     Disable MFA for user account.
     """
-    email = request.get("email")
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email is required"
-        )
+    email = request.email
     
     user = get_user_by_email(email)
     if not user:
@@ -618,22 +605,34 @@ async def get_mfa_status(email: str):
 # -------------------------------
 # Helper Functions
 # -------------------------------
-async def send_mfa_code_to_user(user: Dict[str, Any]):
+def issue_mfa_code(user: Dict[str, Any]) -> str:
     """
-    Generate and send MFA code to user.
-    This function is meant to be run in the background.
+    Generate a new MFA code and store it on the user (one Mongo update).
+    Returns the generated code.
     """
-    # Generate new MFA code
     mfa_code = mfa_service.generate_mfa_code()
     expires_at = mfa_service.get_code_expiry()
     
-    # Update user with new code
     update_user_mfa_code(
         user_id=user["_id"],
         mfa_code=mfa_code,
         expires_at=expires_at
     )
-    
+    return mfa_code
+
+async def send_mfa_code_to_user(user: Dict[str, Any]):
+    """
+    Generate and send MFA code to user.
+    This function is meant to be run in the background.
+    """
+    mfa_code = issue_mfa_code(user)
+    await send_mfa_code_email(user, mfa_code)
+
+async def send_mfa_code_email(user: Dict[str, Any], mfa_code: str):
+    """
+    Email an already-stored MFA code to the user.
+    This function is meant to be run in the background.
+    """
     # Determine which email to use
     mfa_email = user.get("mfa_email") or user["email"]
     
@@ -644,8 +643,8 @@ async def send_mfa_code_to_user(user: Dict[str, Any]):
             mfa_code=mfa_code,
             user_email=user["email"]
         )
-        logger.debug(f"MFA code sent to {mfa_email} for user {user['email']}")
+        logger.debug("MFA code sent to=%s user=%s", mfa_email, user['email'])
     except Exception as e:
-        logger.error(f"Failed to send MFA email to {mfa_email}: {e}")
+        logger.error("Failed to send MFA email to %s: %s", mfa_email, e)
         # Don't raise error to prevent email enumeration
         # The code is still saved, user can request resend
\ No newline at end of file
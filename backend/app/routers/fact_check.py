@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from functools import lru_cache
+import asyncio
+import hashlib
+import json
+import logging
+from cachetools import TTLCache
 from bson import ObjectId
 from ..database import (
     versions_collection, 
@@ -8,28 +17,139 @@ from ..database import (
     get_page_versions,
     get_tracked_page,
     get_tracked_pages,
-    doc_to_dict
+    doc_to_dict,
+    pages_list_cache,
+    pages_list_cache_lock
 )
 from ..services.fact_check_service import FactCheckService
 from ..services.diff_service import DiffService
 from ..services.ai_service import ai_service  # ✅ ADDED: Import AI service
 from ..schemas.fact_check import FactCheckRequest, FactCheckResponse, FactCheckItem, ClaimType, Verdict
 from ..schemas.diff import DiffRequest, DiffResponse, ContentChange, VersionInfo
-import resend
+from ..clients import resend_http_client
+import jinja2
 import os
+import textwrap
 
 router = APIRouter(prefix="/api/fact-check", tags=["fact-check"])
+logger = logging.getLogger(__name__)
 
 # Service instance for diff operations
 diff_service = DiffService()
 
+# ✅ Projections: skip html_content (can be hundreds of KB) when only text is needed
+_FACT_CHECK_VERSION_FIELDS = {"text_content": 1, "page_id": 1, "timestamp": 1}
+_COMPARE_VERSION_FIELDS = {"text_content": 1, "content_hash": 1, "page_id": 1, "timestamp": 1, "change_significance_score": 1}
+
+@lru_cache(maxsize=1)
+def get_fact_check_service() -> FactCheckService:
+    """Shared FactCheckService (stateless after init) injected via Depends"""
+    return FactCheckService()
+
+# ✅ Fact-check email HTML, compiled once at import (autoescape keeps page titles/URLs safe)
+_FACT_CHECK_EMAIL_TMPL = jinja2.Environment(autoescape=True).from_string("""
+<!DOCTYPE html>
+<html>
+<body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; color: white; text-align: center; border-radius: 10px 10px 0 0;">
+        <h1 style="margin: 0; font-size: 24px;">📋 Fact-Check Results</h1>
+        <p style="margin: 10px 0 0 0; opacity: 0.9;">Your content analysis is ready</p>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 25px; border-radius: 0 0 10px 10px;">
+        <!-- Content Info -->
+        <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+            <h3 style="margin-top: 0; color: #333;">{{ page_title }}</h3>
+            <p style="color: #666; margin-bottom: 5px;"><strong>URL:</strong> {{ page_url }}</p>
+            <p style="color: #666; margin: 0;"><strong>Analyzed:</strong> {{ analyzed_at }}</p>
+        </div>
+
+        <!-- Credibility Score -->
+        <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); text-align: center;">
+            <h3 style="margin-top: 0; color: #333;">Credibility Score</h3>
+            <div style="font-size: 48px; font-weight: bold; color: {{ credibility_color }};">
+                {{ credibility_score }}%
+            </div>
+            <p style="color: #666; margin-top: 10px;">
+                Based on {{ total }} claims analyzed
+            </p>
+        </div>
+
+        <!-- Results Breakdown -->
+        <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+            <h3 style="margin-top: 0; color: #333;">Results Breakdown</h3>
+
+            <div style="display: grid; grid-template-columns: repeat(2, 1fr); gap: 15px; margin-top: 15px;">
+                <!-- Verified -->
+                <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
+                    <div style="font-size: 24px; font-weight: bold; color: #51cf66;">
+                        {{ verified_claims }}
+                    </div>
+                    <div style="color: #666; font-size: 14px;">Verified Claims</div>
+                </div>
+
+                <!-- Unverified -->
+                <div style="text-align: center; padding: 15px; background: #fff7ed; border-radius: 8px;">
+                    <div style="font-size: 24px; font-weight: bold; color: #ff922b;">
+                        {{ unverified_claims }}
+                    </div>
+                    <div style="color: #666; font-size: 14px;">Unverified Claims</div>
+                </div>
+
+                <!-- False -->
+                <div style="text-align: center; padding: 15px; background: #fef2f2; border-radius: 8px;">
+                    <div style="font-size: 24px; font-weight: bold; color: #ff6b6b;">
+                        {{ inconclusive_claims }}
+                    </div>
+                    <div style="color: #666; font-size: 14px;">False Claims</div>
+                </div>
+
+                <!-- Total -->
+                <div style="text-align: center; padding: 15px; background: #f8f9fa; border-radius: 8px;">
+                    <div style="font-size: 24px; font-weight: bold; color: #667eea;">
+                        {{ total }}
+                    </div>
+                    <div style="color: #666; font-size: 14px;">Total Claims</div>
+                </div>
+            </div>
+        </div>
+
+        <!-- Action Button -->
+        <div style="text-align: center; margin-top: 25px;">
+            <a href="{{ page_url }}"
+               style="display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; font-weight: bold;"
+               target="_blank">
+                View Original Content
+            </a>
+        </div>
+
+        <!-- Footer -->
+        <div style="margin-top: 25px; padding-top: 20px; border-top: 1px solid #e9ecef; text-align: center;">
+            <p style="color: #666; font-size: 12px; margin: 0;">
+                This is an automated email from FreshLense Web Content Monitoring System.<br>
+                <a href="#" style="color: #667eea; text-decoration: none;">Unsubscribe from these emails</a>
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+# Credibility score thresholds -> display colour (highest threshold first)
+_CRED_COLORS = ((80, "#51cf66"), (60, "#ff922b"), (0, "#ff6b6b"))
+
+def credibility_color(credibility_score: int) -> str:
+    """Colour used to display a credibility score"""
+    return next(color for threshold, color in _CRED_COLORS if credibility_score >= threshold)
+
 # ✅ EMAIL FUNCTION (keep existing)
-def send_fact_check_email(to_email: str, page_title: str, page_url: str, results_summary: dict):
-    """Send fact-check results email via Resend"""
+async def send_fact_check_email(to_email: str, page_title: str, page_url: str, results_summary: dict,
+                                include_text: bool = False):
+    """Send fact-check results email via the Resend REST API (pooled async client).
+    Runs as a background task, so every failure is caught and logged here."""
     try:
-        resend.api_key = os.getenv("RESEND_API_KEY")
-        if not resend.api_key:
-            print("⚠️ RESEND_API_KEY not found in environment")
+        if not os.getenv("RESEND_API_KEY"):
+            logger.warning("⚠️ RESEND_API_KEY not found in environment")
             return False
         
         from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
@@ -37,103 +157,32 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
         total = results_summary.get("total_claims", 0)
         verified = results_summary.get("verified_claims", 0)
         credibility_score = int((verified / total * 100)) if total > 0 else 0
+        analyzed_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')
         
         params = {
             "from": f"FreshLense <{from_email}>",
             "to": [to_email],
-            "subject": f"📋 FreshLense Fact-Check Results: {page_title[:50]}{'...' if len(page_title) > 50 else ''}",
-            "html": f"""
-            <!DOCTYPE html>
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; color: white; text-align: center; border-radius: 10px 10px 0 0;">
-                    <h1 style="margin: 0; font-size: 24px;">📋 Fact-Check Results</h1>
-                    <p style="margin: 10px 0 0 0; opacity: 0.9;">Your content analysis is ready</p>
-                </div>
-                
-                <div style="background: #f8f9fa; padding: 25px; border-radius: 0 0 10px 10px;">
-                    <!-- Content Info -->
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                        <h3 style="margin-top: 0; color: #333;">{page_title}</h3>
-                        <p style="color: #666; margin-bottom: 5px;"><strong>URL:</strong> {page_url}</p>
-                        <p style="color: #666; margin: 0;"><strong>Analyzed:</strong> {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}</p>
-                    </div>
-                    
-                    <!-- Credibility Score -->
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); text-align: center;">
-                        <h3 style="margin-top: 0; color: #333;">Credibility Score</h3>
-                        <div style="font-size: 48px; font-weight: bold; color: {"#51cf66" if credibility_score >= 80 else "#ff922b" if credibility_score >= 60 else "#ff6b6b"};">
-                            {credibility_score}%
-                        </div>
-                        <p style="color: #666; margin-top: 10px;">
-                            Based on {total} claims analyzed
-                        </p>
-                    </div>
-                    
-                    <!-- Results Breakdown -->
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                        <h3 style="margin-top: 0; color: #333;">Results Breakdown</h3>
-                        
-                        <div style="display: grid; grid-template-columns: repeat(2, 1fr); gap: 15px; margin-top: 15px;">
-                            <!-- Verified -->
-                            <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
-                                <div style="font-size: 24px; font-weight: bold; color: #51cf66;">
-                                    {results_summary.get('verified_claims', 0)}
-                                </div>
-                                <div style="color: #666; font-size: 14px;">Verified Claims</div>
-                            </div>
-                            
-                            <!-- Unverified -->
-                            <div style="text-align: center; padding: 15px; background: #fff7ed; border-radius: 8px;">
-                                <div style="font-size: 24px; font-weight: bold; color: #ff922b;">
-                                    {results_summary.get('unverified_claims', 0)}
-                                </div>
-                                <div style="color: #666; font-size: 14px;">Unverified Claims</div>
-                            </div>
-                            
-                            <!-- False -->
-                            <div style="text-align: center; padding: 15px; background: #fef2f2; border-radius: 8px;">
-                                <div style="font-size: 24px; font-weight: bold; color: #ff6b6b;">
-                                    {results_summary.get('inconclusive_claims', 0)}
-                                </div>
-                                <div style="color: #666; font-size: 14px;">False Claims</div>
-                            </div>
-                            
-                            <!-- Total -->
-                            <div style="text-align: center; padding: 15px; background: #f8f9fa; border-radius: 8px;">
-                                <div style="font-size: 24px; font-weight: bold; color: #667eea;">
-                                    {total}
-                                </div>
-                                <div style="color: #666; font-size: 14px;">Total Claims</div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <!-- Action Button -->
-                    <div style="text-align: center; margin-top: 25px;">
-                        <a href="{page_url}" 
-                           style="display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; font-weight: bold;"
-                           target="_blank">
-                            View Original Content
-                        </a>
-                    </div>
-                    
-                    <!-- Footer -->
-                    <div style="margin-top: 25px; padding-top: 20px; border-top: 1px solid #e9ecef; text-align: center;">
-                        <p style="color: #666; font-size: 12px; margin: 0;">
-                            This is an automated email from FreshLense Web Content Monitoring System.<br>
-                            <a href="#" style="color: #667eea; text-decoration: none;">Unsubscribe from these emails</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """,
-            "text": f"""FreshLense Fact-Check Results
+            "subject": f"📋 FreshLense Fact-Check Results: {textwrap.shorten(page_title, width=50, placeholder='…')}",
+            "html": _FACT_CHECK_EMAIL_TMPL.render(
+                page_title=page_title,
+                page_url=page_url,
+                analyzed_at=analyzed_at,
+                credibility_score=credibility_score,
+                credibility_color=credibility_color(credibility_score),
+                total=total,
+                verified_claims=verified,
+                unverified_claims=results_summary.get("unverified_claims", 0),
+                inconclusive_claims=results_summary.get("inconclusive_claims", 0)
+            )
+        }
+        
+        # Plain-text part only on request - Resend derives one from the HTML otherwise
+        if include_text:
+            params["text"] = f"""FreshLense Fact-Check Results
 
 Content: {page_title}
 URL: {page_url}
-Analyzed: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}
+Analyzed: {analyzed_at}
 
 Results Summary:
 ✅ Verified Claims: {results_summary.get('verified_claims', 0)}
@@ -145,35 +194,94 @@ Results Summary:
 View original content: {page_url}
 
 This is an automated message from FreshLense Web Content Monitoring System."""
-        }
         
-        email = resend.Emails.send(params)
-        print(f"✅ Fact-check email sent to {to_email}, ID: {email['id']}")
+        response = await resend_http_client.post("/emails", json=params)
+        response.raise_for_status()
+        logger.debug("✅ Fact-check email sent to %s, ID: %s", to_email, response.json().get('id'))
         return True
         
     except Exception as e:
-        print(f"❌ Failed to send email to {to_email}: {e}")
+        logger.exception("❌ Failed to send email to %s", to_email)
         return False
 
+# ✅ Version content is immutable, so fact-check and compare results can be memoized
+_fact_check_cache = TTLCache(maxsize=10_000, ttl=86400)  # sha256(text) -> results
+_compare_cache = TTLCache(maxsize=256, ttl=3600)  # (old_id, new_id) -> serialized DiffResponse
+_inflight: Dict[bytes, asyncio.Task] = {}  # sha256(text) -> check already running
+
+async def _run_check(fact_check_service: FactCheckService, key: bytes, text_content: str):
+    """The shared check itself - a task of its own, so no single request's cancellation can stop it"""
+    results = await fact_check_service.check_content(text_content)
+    _fact_check_cache[key] = results
+    return results
+
+def _finish_check(key: bytes, task: asyncio.Task):
+    """Done-callback: forget the in-flight task and mark its exception retrieved if nobody was left waiting"""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()
+
+async def _check_content_cached(fact_check_service: FactCheckService, text_content: str):
+    """Run check_content, reusing results for identical text.
+    Concurrent requests for the same text await one shared check instead of each calling the LLM."""
+    key = hashlib.sha256(text_content.encode('utf-8')).digest()
+    cached = _fact_check_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_check(fact_check_service, key, text_content))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _finish_check(key, done))
+    # shield: a disconnecting caller (the first one included) must not cancel the check for everyone else
+    return await asyncio.shield(task)
+
+def _json_body(model: BaseModel) -> Response:
+    """Serialize a response model with pydantic-core directly.
+    Returning a Response skips FastAPI's jsonable_encoder + json.dumps pass over large claim/diff payloads."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+def _oid(value: str, field: str) -> ObjectId:
+    """Parse an ObjectId up front so malformed IDs get a 400 instead of a failed query"""
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=400, detail=f"Invalid {field} format")
+    return ObjectId(value)
+
+def _tally(results) -> Dict[str, int]:
+    """Count verdicts in a single pass over the fact-check results"""
+    counts = {Verdict.TRUE: 0, Verdict.FALSE: 0, Verdict.UNVERIFIED: 0}
+    for r in results:
+        counts[r.verdict] = counts.get(r.verdict, 0) + 1
+    return {
+        "total_claims": len(results),
+        "verified_claims": counts[Verdict.TRUE],
+        "unverified_claims": counts[Verdict.FALSE],
+        "inconclusive_claims": counts[Verdict.UNVERIFIED]
+    }
+
 # ✅ UPDATED ENDPOINT: Get all tracked pages for the user WITH VERSIONING INFO
 @router.get("/pages", response_model=List[Dict[str, Any]])
-async def get_user_pages(current_user: dict = Depends(lambda: None)):
+def get_user_pages():
     """Get all tracked pages for the user"""
     try:
-        # In a real app, you would filter by current_user.id
+        # ✅ Serve from the short-lived cache (invalidated on page/version writes)
+        cache_key = None  # user id once auth is wired in
+        with pages_list_cache_lock:
+            cached = pages_list_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # In a real app, you would filter by the authenticated user's id
         # For now, return all pages (or implement authentication later)
         pages = get_tracked_pages(None)  # Pass None for now, or user_id when auth is implemented
         
         page_list = []
         for page in pages:
-            # Get version count for each page
-            version_count = versions_collection.count_documents({"page_id": page["_id"]})
-            
-            # ✅ ADDED: Get significant versions count
-            significant_versions = versions_collection.count_documents({
-                "page_id": page["_id"],
-                "change_significance_score": {"$gte": 0.3}
-            })
+            # ✅ Denormalized counters maintained with $inc on version insert/prune
+            version_count = page.get("version_count", 0)
+            significant_versions = page.get("significant_version_count", 0)
             
             page_list.append({
                 "id": str(page["_id"]),
@@ -190,21 +298,92 @@ async def get_user_pages(current_user: dict = Depends(lambda: None)):
                 })
             })
         
+        with pages_list_cache_lock:
+            pages_list_cache[cache_key] = page_list
         return page_list
         
     except Exception as e:
-        print(f"💥 Error fetching pages: {str(e)}")
+        logger.exception("💥 Error fetching pages")
         raise HTTPException(status_code=500, detail=f"Failed to fetch pages: {str(e)}")
 
+def _json_default(value):
+    """json.dumps fallback matching FastAPI's encoding of datetimes/ObjectIds"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _format_version(version: dict, version_number: int) -> dict:
+    """Shape one projected version document for the versions list"""
+    content_preview = version["preview"] + "..." if version["content_len"] > 200 else version["preview"]
+    
+    # ✅ ADDED: Smart versioning info
+    significance_score = version.get("change_significance_score", 0.0)
+    change_metrics = version.get("change_metrics", {})
+    
+    return {
+        "id": str(version["_id"]),
+        "page_id": str(version["page_id"]),
+        "version_number": version_number,
+        "captured_at": version["timestamp"],
+        "content_preview": content_preview,
+        "title": f"Version {version_number} - {version['timestamp'].strftime('%Y-%m-%d %H:%M')}",
+        "has_content": version["has_content"],
+        # ✅ ADDED: Smart versioning fields
+        "significance_score": significance_score,
+        "is_significant": significance_score >= 0.3,
+        "change_percentage": change_metrics.get("change_percentage", 0.0),
+        "word_count": change_metrics.get("total_words_new", 0),
+        "checksum": version.get("checksum", ""),
+        "content_hash": version.get("content_hash", "")
+    }
+
+def _stream_versions(cursor, page: dict, show_all: bool, min_significance: float):
+    """Yield the versions response as JSON chunks, one version at a time (already sorted newest first)"""
+    total = 0  # versions actually sent
+    significant = 0
+    yield b'{"versions":['
+    try:
+        for version in cursor:
+            item = _format_version(version, total + 1)
+            chunk = (b"," if total else b"") + json.dumps(item, default=_json_default).encode("utf-8")
+            yield chunk
+            total += 1
+            significant += item["is_significant"]
+    except Exception:
+        # Headers are already sent - abort the body instead of closing the document, so a
+        # truncated list can't pass for a complete one
+        logger.exception("💥 Error streaming versions")
+        raise
+    finally:
+        cursor.close()
+    
+    tail = {
+        "page_info": {
+            "page_id": str(page["_id"]),
+            "url": page.get("url", ""),
+            "display_name": page.get("display_name", page.get("url", "Untitled Page")),
+            "last_checked": page.get("last_checked"),
+            "version_count": total,
+            "significant_versions": significant,
+            "versioning_config": page.get("versioning_config", {})
+        },
+        "filters_applied": {
+            "show_all": show_all,
+            "min_significance": min_significance,
+            "total_filtered": total
+        }
+    }
+    yield b"]," + json.dumps(tail, default=_json_default).encode("utf-8")[1:]
+
 # ✅ ENHANCED ENDPOINT: Get all versions for a specific page WITH FILTERING
 @router.get("/pages/{page_id}/versions", response_model=Dict[str, Any])
-async def get_page_versions_endpoint(
+def get_page_versions_endpoint(
     page_id: str, 
     show_all: bool = Query(default=False, description="Show all versions including insignificant ones"),
-    min_significance: float = Query(default=0.3, ge=0.0, le=1.0, description="Minimum significance score to show"),
-    current_user: dict = Depends(lambda: None)
+    min_significance: float = Query(default=0.3, ge=0.0, le=1.0, description="Minimum significance score to show")
 ):
     """Get all versions for a specific page WITH SMART FILTERING"""
+    page_oid = _oid(page_id, "page ID")
     try:
         # Verify page exists
         page = get_tracked_page(page_id)
@@ -212,72 +391,48 @@ async def get_page_versions_endpoint(
             raise HTTPException(status_code=404, detail="Page not found")
         
         # Build query based on filters
-        query = {"page_id": ObjectId(page_id)}
+        query = {"page_id": page_oid}
         if not show_all:
             query["change_significance_score"] = {"$gte": min_significance}
         
-        # Get versions with sorting
-        versions = list(versions_collection.find(query).sort("timestamp", -1).limit(100))
-        
-        # Convert to proper format with ENHANCED INFO
-        version_list = []
-        for i, version in enumerate(versions):
-            content = version.get("text_content", "")
-            content_preview = content[:200] + "..." if len(content) > 200 else content
-            
-            # ✅ ADDED: Smart versioning info
-            significance_score = version.get("change_significance_score", 0.0)
-            change_metrics = version.get("change_metrics", {})
-            
-            version_list.append({
-                "id": str(version["_id"]),
-                "page_id": str(version["page_id"]),
-                "version_number": i + 1,
-                "captured_at": version["timestamp"],
-                "content_preview": content_preview,
-                "title": f"Version {i+1} - {version['timestamp'].strftime('%Y-%m-%d %H:%M')}",
-                "has_content": bool(content.strip()),
-                # ✅ ADDED: Smart versioning fields
-                "significance_score": significance_score,
-                "is_significant": significance_score >= 0.3,
-                "change_percentage": change_metrics.get("change_percentage", 0.0),
-                "word_count": change_metrics.get("total_words_new", 0),
-                "checksum": version.get("checksum", ""),
-                "content_hash": version.get("content_hash", "")
-            })
-        
-        # Re-number after reversing (already sorted newest first)
-        for i, version in enumerate(version_list):
-            version["version_number"] = i + 1
-        
-        return {
-            "page_info": {
-                "page_id": str(page["_id"]),
-                "url": page.get("url", ""),
-                "display_name": page.get("display_name", page.get("url", "Untitled Page")),
-                "last_checked": page.get("last_checked"),
-                "version_count": len(versions),
-                "significant_versions": len([v for v in version_list if v.get("is_significant", False)]),
-                "versioning_config": page.get("versioning_config", {})
-            },
-            "versions": version_list,
-            "filters_applied": {
-                "show_all": show_all,
-                "min_significance": min_significance,
-                "total_filtered": len(version_list)
-            }
-        }
+        # Get versions with sorting - only a 200-char preview of the text leaves the server
+        cursor = versions_collection.aggregate([
+            {"$match": query},
+            {"$sort": {"timestamp": -1}},
+            {"$limit": 100},
+            {"$project": {
+                "page_id": 1,
+                "timestamp": 1,
+                "change_significance_score": 1,
+                "change_metrics.change_percentage": 1,
+                "change_metrics.total_words_new": 1,
+                "checksum": 1,
+                "content_hash": 1,
+                "preview": {"$substrCP": [{"$ifNull": ["$text_content", ""]}, 0, 200]},
+                "content_len": {"$strLenCP": {"$ifNull": ["$text_content", ""]}},
+                "has_content": {"$gt": [{"$strLenCP": {"$trim": {"input": {"$ifNull": ["$text_content", ""]}}}}, 0]}
+            }}
+        ])
+        
+        # ✅ Stream the JSON as the cursor yields - page_info/filters go last since they count the versions
+        return StreamingResponse(
+            _stream_versions(cursor, page, show_all, min_significance),
+            media_type="application/json"
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"💥 Error fetching versions: {str(e)}")
+        logger.exception("💥 Error fetching versions")
         raise HTTPException(status_code=500, detail=f"Failed to fetch versions: {str(e)}")
 
 # ✅ ENHANCED ENDPOINT: Get specific version by ID WITH DETAILED INFO
 @router.get("/versions/{version_id}")
-async def get_version_by_id(version_id: str, current_user: dict = Depends(lambda: None)):
+def get_version_by_id(version_id: str):
     """Get a specific page version by ID WITH SMART VERSIONING DETAILS"""
+    version_oid = _oid(version_id, "version ID")
     try:
-        version = versions_collection.find_one({"_id": ObjectId(version_id)})
+        version = versions_collection.find_one({"_id": version_oid})
         if not version:
             raise HTTPException(status_code=404, detail="Version not found")
         
@@ -290,6 +445,7 @@ async def get_version_by_id(version_id: str, current_user: dict = Depends(lambda
             # Get previous version for comparison
             prev_version = versions_collection.find_one(
                 {"page_id": version["page_id"], "timestamp": {"$lt": version["timestamp"]}},
+                {"text_content": 1},
                 sort=[("timestamp", -1)]
             )
             
@@ -318,29 +474,36 @@ async def get_version_by_id(version_id: str, current_user: dict = Depends(lambda
             "metadata": version.get("metadata", {})
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"💥 Error fetching version: {str(e)}")
+        logger.exception("💥 Error fetching version")
         raise HTTPException(status_code=500, detail=f"Failed to fetch version: {str(e)}")
 
 # ✅ EXISTING ENDPOINTS (keep these as they are)
 @router.post("/check", response_model=FactCheckResponse)
-async def fact_check_page(request: FactCheckRequest, current_user: dict = Depends(lambda: None)):
+async def fact_check_page(
+    request: FactCheckRequest,
+    fact_check_service: FactCheckService = Depends(get_fact_check_service)
+):
     """Perform fact checking on a page version"""
+    version_oid = _oid(request.version_id, "version ID")
     try:
-        fact_check_service = FactCheckService()
-        print("🔄 DEBUG: Created fresh FactCheckService instance")
-        
-        version = versions_collection.find_one({"_id": ObjectId(request.version_id)})
+        # Blocking pymongo calls go to the threadpool so the event loop stays free
+        version = await run_in_threadpool(
+            versions_collection.find_one, {"_id": version_oid}, _FACT_CHECK_VERSION_FIELDS
+        )
         if not version:
             raise HTTPException(status_code=404, detail="Page version not found")
         
-        page = get_tracked_page(str(version["page_id"]))
+        page = await run_in_threadpool(get_tracked_page, str(version["page_id"]))
         if not page:
             raise HTTPException(status_code=404, detail="Page not found")
         
         text_content = version.get("text_content", "")
-        print(f"🔍 DEBUG: Starting fact check on {len(text_content)} chars of content")
-        fact_check_results = await fact_check_service.check_content(text_content)
+        logger.debug("🔍 Starting fact check on %d chars of content", len(text_content))
+        fact_check_results = await _check_content_cached(fact_check_service, text_content)
+        results_summary = _tally(fact_check_results)
         
         response = FactCheckResponse(
             page_id=str(version["page_id"]),
@@ -349,25 +512,25 @@ async def fact_check_page(request: FactCheckRequest, current_user: dict = Depend
             page_title=page.get("display_name", ""),
             checked_at=datetime.utcnow(),
             results=fact_check_results,
-            total_claims=len(fact_check_results),
-            verified_claims=len([r for r in fact_check_results if r.verdict == Verdict.TRUE]),
-            unverified_claims=len([r for r in fact_check_results if r.verdict == Verdict.FALSE]),
-            inconclusive_claims=len([r for r in fact_check_results if r.verdict == Verdict.UNVERIFIED])
+            **results_summary
         )
         
-        return response
+        return _json_body(response)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"💥 Fact checking failed: {str(e)}")
+        logger.exception("💥 Fact checking failed")
         raise HTTPException(status_code=500, detail=f"Fact checking failed: {str(e)}")
 
 @router.post("/check-direct", response_model=FactCheckResponse)
-async def fact_check_direct_content(request: dict, current_user: dict = Depends(lambda: None)):
+async def fact_check_direct_content(
+    request: dict,
+    background_tasks: BackgroundTasks,
+    fact_check_service: FactCheckService = Depends(get_fact_check_service)
+):
     """Perform fact checking on directly provided text content"""
     try:
-        fact_check_service = FactCheckService()
-        print("🔄 DEBUG: Created fresh FactCheckService instance for direct check")
-        
         text_content = request.get("content", "")
         page_url = request.get("page_url", "Direct input")
         page_title = request.get("page_title", "User provided content")
@@ -379,8 +542,9 @@ async def fact_check_direct_content(request: dict, current_user: dict = Depends(
         if len(text_content) > 15000:
             text_content = text_content[:15000] + "... [content truncated]"
         
-        print(f"🔍 DEBUG: Starting direct fact check on {len(text_content)} chars of content")
-        fact_check_results = await fact_check_service.check_content(text_content)
+        logger.debug("🔍 Starting direct fact check on %d chars of content", len(text_content))
+        fact_check_results = await _check_content_cached(fact_check_service, text_content)
+        results_summary = _tally(fact_check_results)
         
         response = FactCheckResponse(
             page_id="direct_input",
@@ -389,50 +553,47 @@ async def fact_check_direct_content(request: dict, current_user: dict = Depends(
             page_title=page_title,
             checked_at=datetime.utcnow(),
             results=fact_check_results,
-            total_claims=len(fact_check_results),
-            verified_claims=len([r for r in fact_check_results if r.verdict == Verdict.TRUE]),
-            unverified_claims=len([r for r in fact_check_results if r.verdict == Verdict.FALSE]),
-            inconclusive_claims=len([r for r in fact_check_results if r.verdict == Verdict.UNVERIFIED])
+            **results_summary
         )
         
-        # Send email if requested
+        # Send email if requested - in the background so the response isn't held up by Resend
         if user_email and os.getenv("EMAIL_ENABLED", "true").lower() == "true":
-            try:
-                results_summary = {
-                    "total_claims": len(fact_check_results),
-                    "verified_claims": len([r for r in fact_check_results if r.verdict == Verdict.TRUE]),
-                    "unverified_claims": len([r for r in fact_check_results if r.verdict == Verdict.FALSE]),
-                    "inconclusive_claims": len([r for r in fact_check_results if r.verdict == Verdict.UNVERIFIED])
-                }
-                
-                email_sent = send_fact_check_email(
-                    to_email=user_email,
-                    page_title=page_title,
-                    page_url=page_url,
-                    results_summary=results_summary
-                )
-                
-                if email_sent:
-                    print(f"📧 Email notification sent to {user_email}")
-                else:
-                    print(f"⚠️ Email notification failed for {user_email}")
-                
-            except Exception as email_error:
-                print(f"⚠️ Email sending error (but fact-check succeeded): {email_error}")
+            background_tasks.add_task(
+                send_fact_check_email,
+                to_email=user_email,
+                page_title=page_title,
+                page_url=page_url,
+                results_summary=results_summary
+            )
+            logger.debug("📧 Email notification queued for %s", user_email)
         
-        return response
+        return _json_body(response)
         
     except Exception as e:
-        print(f"💥 Direct fact checking failed: {str(e)}")
+        logger.exception("💥 Direct fact checking failed")
         raise HTTPException(status_code=500, detail=f"Direct fact checking failed: {str(e)}")
 
 # ✅ ENHANCED ENDPOINT: Compare versions WITH SIGNIFICANCE ANALYSIS AND AI SUMMARY
 @router.post("/compare", response_model=DiffResponse)
-async def compare_versions(request: DiffRequest, current_user: dict = Depends(lambda: None)):
+async def compare_versions(request: DiffRequest):
     """Compare two page versions and show differences WITH SIGNIFICANCE ANALYSIS AND AI SUMMARY"""
+    old_id = _oid(request.old_version_id, "old version ID")
+    new_id = _oid(request.new_version_id, "new version ID")
     try:
-        old_version = versions_collection.find_one({"_id": ObjectId(request.old_version_id)})
-        new_version = versions_collection.find_one({"_id": ObjectId(request.new_version_id)})
+        cache_key = (request.old_version_id, request.new_version_id)
+        cached = _compare_cache.get(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        # ✅ Fetch both versions in a single round trip
+        found = {
+            doc["_id"]: doc
+            for doc in await run_in_threadpool(
+                lambda: list(versions_collection.find({"_id": {"$in": [old_id, new_id]}}, _COMPARE_VERSION_FIELDS))
+            )
+        }
+        old_version = found.get(old_id)
+        new_version = found.get(new_id)
         
         if not old_version or not new_version:
             raise HTTPException(status_code=404, detail="One or both versions not found")
@@ -440,37 +601,65 @@ async def compare_versions(request: DiffRequest, current_user: dict = Depends(la
         if str(old_version["page_id"]) != str(new_version["page_id"]):
             raise HTTPException(status_code=400, detail="Versions must be from the same page")
         
+        # ✅ Identical content (e.g. a recheck that found nothing new) - skip the diff and AI work entirely
+        old_hash = old_version.get("content_hash")
+        if old_hash and old_hash == new_version.get("content_hash"):
+            response = DiffResponse(
+                page_id=str(old_version["page_id"]),
+                old_version_id=request.old_version_id,
+                new_version_id=request.new_version_id,
+                old_timestamp=old_version["timestamp"],
+                new_timestamp=new_version["timestamp"],
+                changes=[],
+                total_changes=0,
+                has_changes=False,
+                similarity_score=1.0
+            )
+            body = response.model_dump_json()
+            _compare_cache[cache_key] = body
+            return Response(content=body, media_type="application/json")
+        
         old_text = old_version.get("text_content", "")
         new_text = new_version.get("text_content", "")
         
         # Get page details for AI summary
-        page = get_tracked_page(str(old_version["page_id"]))
+        page = await run_in_threadpool(get_tracked_page, str(old_version["page_id"]))
         page_title = page.get("display_name") or page.get("url", "") if page else ""
         page_url = page.get("url", "") if page else ""
         
         # ✅ ADDED: Generate AI summary
-        ai_summary = None
-        try:
-            ai_summary = await ai_service.generate_change_summary(
-                old_content=old_text,
-                new_content=new_text,
-                page_title=page_title,
-                url=page_url
-            )
-            print(f"✅ AI summary generated for comparison")
-        except Exception as ai_error:
-            print(f"⚠️ Failed to generate AI summary: {ai_error}")
-            ai_summary = None
-        
-        # Significance analysis
-        significance_analysis = diff_service.analyze_change_significance(old_text, new_text)
-        
-        diff_result = diff_service.compare_text(old_text, new_text)
-        metrics = diff_service.calculate_change_metrics(old_text, new_text)
-        html_diff = diff_service.generate_html_diff(old_text, new_text)
-        side_by_side = diff_service.get_side_by_side_diff(old_text, new_text)
+        async def _ai_summary():
+            try:
+                summary = await ai_service.generate_change_summary(
+                    old_content=old_text,
+                    new_content=new_text,
+                    page_title=page_title,
+                    url=page_url
+                )
+                logger.debug("✅ AI summary generated for comparison")
+                return summary
+            except Exception as ai_error:
+                logger.warning("⚠️ Failed to generate AI summary: %s", ai_error)
+                return None
+        
+        # ✅ Diff work is CPU-bound - run it in the threadpool, overlapped with the AI call
+        (
+            ai_summary,
+            significance_analysis,
+            diff_result,
+            metrics,
+            html_diff,
+            side_by_side
+        ) = await asyncio.gather(
+            _ai_summary(),
+            run_in_threadpool(diff_service.analyze_change_significance, old_text, new_text),
+            run_in_threadpool(diff_service.compare_text, old_text, new_text),
+            run_in_threadpool(diff_service.calculate_change_metrics, old_text, new_text),
+            run_in_threadpool(diff_service.generate_html_diff, old_text, new_text),
+            run_in_threadpool(diff_service.get_side_by_side_diff, old_text, new_text)
+        )
         
-        return DiffResponse(
+        response = DiffResponse(
             page_id=str(old_version["page_id"]),
             old_version_id=request.old_version_id,
             new_version_id=request.new_version_id,
@@ -491,14 +680,23 @@ async def compare_versions(request: DiffRequest, current_user: dict = Depends(la
             ai_summary=ai_summary
         )
         
+        # Don't pin a result whose AI summary failed - let the next request retry it
+        body = response.model_dump_json()
+        if ai_summary is not None:
+            _compare_cache[cache_key] = body
+        return Response(content=body, media_type="application/json")
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"💥 Comparison failed: {str(e)}")
+        logger.exception("💥 Comparison failed")
         raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
 
 # ✅ NEW ENDPOINT: Get versioning statistics
 @router.get("/pages/{page_id}/versioning-stats")
-async def get_versioning_stats(page_id: str, current_user: dict = Depends(lambda: None)):
+def get_versioning_stats(page_id: str):
     """Get versioning statistics and efficiency metrics"""
+    page_oid = _oid(page_id, "page ID")
     try:
         page = get_tracked_page(page_id)
         if not page:
@@ -506,7 +704,7 @@ async def get_versioning_stats(page_id: str, current_user: dict = Depends(lambda
         
         # Get all versions
         all_versions = list(versions_collection.find(
-            {"page_id": ObjectId(page_id)},
+            {"page_id": page_oid},
             sort=[("timestamp", -1)]
         ))
         
@@ -545,8 +743,10 @@ async def get_versioning_stats(page_id: str, current_user: dict = Depends(lambda
             )
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"💥 Error getting versioning stats: {str(e)}")
+        logger.exception("💥 Error getting versioning stats")
         raise HTTPException(status_code=500, detail=f"Failed to get versioning stats: {str(e)}")
 
 def _generate_versioning_recommendations(total: int, significant: int, efficiency: float, config: dict) -> List[str]:
@@ -568,12 +768,9 @@ def _generate_versioning_recommendations(total: int, significant: int, efficienc
     return recommendations
 
 @router.get("/debug-serb")
-async def debug_serp_integration():
+async def debug_serp_integration(fact_check_service: FactCheckService = Depends(get_fact_check_service)):
     """Debug SERP API integration"""
     try:
-        fact_check_service = FactCheckService()
-        print("🔄 DEBUG: Created fresh FactCheckService instance for debug")
-        
         config_status = fact_check_service.check_serp_status()
         
         test_claim = {
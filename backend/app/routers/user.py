@@ -20,7 +20,7 @@ from ..schemas.user import (
     NotificationSettingsResponse,
     DeleteAccountRequest
 )
-from ..utils.security import get_current_user, verify_password, get_password_hash
+from ..utils.security import get_current_user, verify_password_async, get_password_hash_async
 from ..services.email_service import send_account_deletion_email
 
 router = APIRouter(prefix="/api/user", tags=["user"])
@@ -98,14 +98,14 @@ async def change_user_password(
         stored_password = current_user.get("hashed_password") if isinstance(current_user, dict) else current_user.hashed_password
         
         # Verify current password
-        if not verify_password(current_password, stored_password):
+        if not await verify_password_async(current_password, stored_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Current password is incorrect"
             )
         
         # Hash new password
-        hashed_new_password = get_password_hash(new_password)
+        hashed_new_password = await get_password_hash_async(new_password)
         
         # Update password in database
         user_id = current_user.get("_id") if isinstance(current_user, dict) else getattr(current_user, "_id", None)
@@ -1,26 +1,67 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 from pymongo.errors import DuplicateKeyError, ConnectionFailure, ServerSelectionTimeoutError
 from datetime import datetime, timedelta
 import os
 from bson import ObjectId
-from passlib.context import CryptContext
 import asyncio
+import functools
+import hashlib
+import threading
+import jinja2
 from typing import Optional
 import logging
 from difflib import SequenceMatcher
-import resend  # ✅ ADD RESEND IMPORT
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
+
+# Optional C-accelerated similarity; difflib is the fallback when rapidfuzz isn't installed.
+# rapidfuzz releases the GIL, so checks offloaded with to_thread really do run alongside the event loop.
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# Similarity below this is a "Major" (>50%) change - an upper bound under it is precise enough
+_MAJOR_SIMILARITY = 0.5
+# Length delta (relative to the longer text) above which a change is "Major" without diffing
+_MAJOR_LENGTH_DELTA = 2 / 3
+
+# (upper bound on change %, severity, email colour) - first band the change fits in wins
+_SEVERITY = (
+    (20.0, "Minor", "#10b981"),  # Green
+    (50.0, "Moderate", "#f59e0b"),  # Orange
+    (float("inf"), "Major", "#ef4444"),  # Red
+)
+
+# Versioning settings for pages that don't carry their own
+DEFAULT_VERSIONING_CONFIG = {
+    "min_change_threshold": 0.05,  # 5% change required
+    "require_significant_keywords": True,
+    "max_versions_kept": 50,
+    "check_structural_changes": True,
+    "prune_strategy": "significant_only"
+}
+
+# (old content hash, new content hash) -> change percentage; checks run in worker threads, hence the lock
+_change_pct_cache = LRUCache(maxsize=4096)
+_change_pct_cache_lock = threading.Lock()
 
 # Import our new safe cleanup services
 from .services.mfa_cleanup_service import mfa_cleanup_service
 from .services.audit_service import audit_service
 # ✅ FIXED IMPORT: Remove leading dot
 from .services.versioning_service import VersioningService
+from .clients import mongo_client, resend_http_client
+from .database import user_is_alive, due_pages_query, to_oid
+from .config import BCRYPT_COST
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing - built on first use so importing the scheduler doesn't load the bcrypt backend
+@functools.cache
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_COST)
 
 # MongoDB connection
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 client = None
 db = None
 
@@ -28,7 +69,7 @@ db = None
 logger = logging.getLogger(__name__)
 
 try:
-    client = MongoClient(MONGO_URI)
+    client = mongo_client  # ✅ Shared pooled client (see clients.py)
     client.admin.command('ping')  # Test the connection
     print("✅ MongoDB connection successful!")
     db = client['freshlense']
@@ -43,31 +84,7 @@ try:
     versions_collection = db['page_versions']
     changes_collection = db['change_logs']
 
-    # Indexes - ✅ UPDATED: No TTL indexes on users collection
-    def create_indexes():
-        # Users indexes - SAFE VERSION (NO TTL!)
-        users_collection.create_index([("email", ASCENDING)], unique=True)
-        users_collection.create_index([("created_at", DESCENDING)])
-        users_collection.create_index([("mfa_code_expires", ASCENDING)])  # Regular index, not TTL!
-        users_collection.create_index([("is_deleted", ASCENDING)])  # For soft delete queries
-        
-        # Pages indexes
-        pages_collection.create_index([("user_id", ASCENDING), ("url", ASCENDING)], unique=True)
-        pages_collection.create_index([("user_id", ASCENDING), ("is_active", ASCENDING)])
-        
-        # Versions indexes
-        versions_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
-        # ✅ ADD NEW INDEXES FOR SMART VERSIONING
-        versions_collection.create_index([("page_id", ASCENDING), ("checksum", ASCENDING)])
-        versions_collection.create_index([("page_id", ASCENDING), ("change_significance_score", DESCENDING)])
-        
-        # Changes indexes
-        changes_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        changes_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
-        
-        print("✅ Database indexes created successfully (NO TTL on users)!")
-
-    create_indexes()
+    # Indexes are created once by database.create_indexes() at app startup
 
 except (ConnectionFailure, ServerSelectionTimeoutError) as e:
     print(f"❌ MongoDB connection failed: {e}")
@@ -81,45 +98,37 @@ def is_db_available():
     return db is not None
 
 
-def doc_to_dict(doc):
-    """Convert MongoDB ObjectIds -> str recursively"""
-    if doc is None:
-        return None
-    if "_id" in doc:
-        doc["_id"] = str(doc["_id"])
-    for key, value in list(doc.items()):
-        if isinstance(value, ObjectId):
-            doc[key] = str(value)
-        elif isinstance(value, dict):
-            doc[key] = doc_to_dict(value)
-        elif isinstance(value, list):
-            doc[key] = [doc_to_dict(v) if isinstance(v, dict) else str(v) if isinstance(v, ObjectId) else v for v in value]
-    return doc
+# ✅ One VersioningService shared by the module helpers and MonitoringScheduler
+_versioning_service = VersioningService()
+if db is not None:
+    _versioning_service.set_collections(versions_collection, pages_collection)
 
 
 # ---------------- User ----------------
-def get_user_by_email(email: str):
+# ✅ Helpers the scheduler awaits are coroutines: pymongo calls run in a worker thread
+# so one slow query doesn't stall every other page check on the event loop
+async def get_user_by_email(email: str):
     """Get user by email address - EXCLUDE DELETED USERS"""
     if db is None:
         return None
-    user = users_collection.find_one({
+    user = await asyncio.to_thread(users_collection.find_one, {
         "email": email,
-        "is_deleted": {"$ne": True}  # ✅ ADDED: Exclude deleted users
+        "is_deleted": False  # ✅ ADDED: Exclude deleted users
     })
     return user
 
 
-def get_user_by_id(user_id):
+async def get_user_by_id(user_id):
     """Get user by ID - EXCLUDE DELETED USERS"""
     if db is None:
         return None
     try:
         # Handle both ObjectId and string user_id
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
-        user = users_collection.find_one({
+            user_id = to_oid(user_id)
+        user = await asyncio.to_thread(users_collection.find_one, {
             "_id": user_id,
-            "is_deleted": {"$ne": True}  # ✅ ADDED: Exclude deleted users
+            "is_deleted": False  # ✅ ADDED: Exclude deleted users
         })
         return user
     except Exception as e:
@@ -128,11 +137,27 @@ def get_user_by_id(user_id):
         return None
 
 
+async def get_users_by_ids(user_ids) -> Optional[dict]:
+    """Fetch several non-deleted users with email alerts on, in one query keyed by _id (opted-out users are left out)"""
+    if db is None:
+        return None
+    try:
+        ids = [to_oid(uid) if isinstance(uid, str) else uid for uid in user_ids]
+        users = await asyncio.to_thread(lambda: list(users_collection.find(
+            {"_id": {"$in": ids}, "is_deleted": False, "notification_preferences.email_alerts": {"$ne": False}},
+            {"email": 1, "notification_preferences.email_alerts": 1}
+        )))
+        return {user["_id"]: user for user in users}
+    except Exception as e:
+        logger.error(f"Error getting users by ID: {e}")
+        return None  # callers fall back to per-user lookups
+
+
 def create_user(user_data: dict):
     """Create a new user with hashed password"""
     if db is None:
         return None
-    hashed_password = pwd_context.hash(user_data['password'])
+    hashed_password = _pwd_context().hash(user_data['password'])
     
     # ✅ ADDED: Soft delete fields with defaults
     user_doc = {
@@ -166,33 +191,29 @@ def create_user(user_data: dict):
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 # ---------------- Tracked Pages ----------------
-def get_tracked_pages(user_id, active_only: bool = True):
+async def get_tracked_pages(user_id, active_only: bool = True):
     """Get all tracked pages for a user - CHECK USER NOT DELETED"""
     if db is None:
         return []
     
     # Handle both ObjectId and string user_id
     if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
-    
-    # ✅ CHECK: User must not be deleted
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
+        user_id = to_oid(user_id)
     
-    if not user:
+    # ✅ CHECK: User must not be deleted (cached liveness check)
+    if not await asyncio.to_thread(user_is_alive, user_id):
         return []  # User doesn't exist or is deleted
     
     query = {"user_id": user_id}
     if active_only:
         query["is_active"] = True
-    pages = pages_collection.find(query).sort("created_at", DESCENDING)
-    return list(pages)
+    return await asyncio.to_thread(
+        lambda: list(pages_collection.find(query).sort("created_at", DESCENDING))
+    )
 
 
 def get_tracked_page(page_id: str):
@@ -214,15 +235,10 @@ def create_tracked_page(page_data: dict, user_id):
     
     # Handle both ObjectId and string user_id
     if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
-    
-    # ✅ CHECK: User must not be deleted
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
+        user_id = to_oid(user_id)
     
-    if not user:
+    # ✅ CHECK: User must not be deleted (cached liveness check)
+    if not user_is_alive(user_id):
         return None  # User doesn't exist or is deleted
     
     # ✅ ADD VERSIONING CONFIG TO NEW PAGES
@@ -237,13 +253,7 @@ def create_tracked_page(page_data: dict, user_id):
         "last_change_detected": None,
         "current_version_id": None,
         # ✅ ADD VERSIONING CONFIG
-        "versioning_config": {
-            "min_change_threshold": 0.05,  # 5% change required
-            "require_significant_keywords": True,
-            "max_versions_kept": 50,
-            "check_structural_changes": True,
-            "prune_strategy": "significant_only"
-        }
+        "versioning_config": dict(DEFAULT_VERSIONING_CONFIG)
     }
     try:
         result = pages_collection.insert_one(page_doc)
@@ -262,7 +272,7 @@ def create_tracked_page(page_data: dict, user_id):
         return None
 
 
-def update_tracked_page(page_id: str, update_data: dict) -> bool:
+async def update_tracked_page(page_id: str, update_data: dict) -> bool:
     """Update a tracked page"""
     if db is None:
         return False
@@ -270,10 +280,12 @@ def update_tracked_page(page_id: str, update_data: dict) -> bool:
     # Handle ObjectId conversion for current_version_id
     update_data_copy = update_data.copy()
     if "current_version_id" in update_data_copy and isinstance(update_data_copy["current_version_id"], str):
-        update_data_copy["current_version_id"] = ObjectId(update_data_copy["current_version_id"])
+        update_data_copy["current_version_id"] = to_oid(update_data_copy["current_version_id"])
     
     try:
-        result = pages_collection.update_one({"_id": ObjectId(page_id)}, {"$set": update_data_copy})
+        result = await asyncio.to_thread(
+            pages_collection.update_one, {"_id": ObjectId(page_id)}, {"$set": update_data_copy}
+        )
         return result.modified_count > 0
     except Exception as e:
         logger.error(f"Error updating tracked page {page_id}: {e}")
@@ -306,39 +318,45 @@ def delete_tracked_page(page_id: str) -> bool:
 
 
 # ---------------- Page Versions ----------------
-def create_page_version(page_id: str, text_content: str, url: str, html_content: str = None):
+async def create_page_version(page_id: str, text_content: str, url: str, html_content: str = None):
     """✅ UPDATED: Create a new page version with smart versioning fields"""
     if db is None:
         return None
     
-    # ✅ ADD SMART VERSIONING FIELDS
-    # Create versioning service and set collections
-    versioning_service = VersioningService()
-    versioning_service.set_collections(versions_collection, pages_collection)
+    # Measure once - both metric blocks below reuse these
+    content_length = len(text_content) if text_content else 0
+    word_count = len(text_content.split()) if text_content else 0
     
+    # ✅ ADD SMART VERSIONING FIELDS
     version = {
         "page_id": ObjectId(page_id),
         "timestamp": datetime.utcnow(),
         "text_content": text_content,
         "html_content": html_content,
         # ✅ SMART VERSIONING FIELDS
-        "content_hash": versioning_service.calculate_content_hash(text_content),
-        "checksum": versioning_service.calculate_quick_checksum(text_content),
+        "content_hash": _versioning_service.calculate_content_hash(text_content),
+        "checksum": _versioning_service.calculate_quick_checksum(text_content),
         "change_significance_score": 1.0,  # Default for first version
         "change_metrics": {
-            "content_length": len(text_content),
-            "word_count": len(text_content.split()) if text_content else 0,
+            "content_length": content_length,
+            "word_count": word_count,
         },
         "metadata": {
             "url": url,
-            "content_length": len(text_content),
-            "word_count": len(text_content.split()) if text_content else 0,
+            "content_length": content_length,
+            "word_count": word_count,
             "fetched_at": datetime.utcnow().isoformat(),
         },
     }
     try:
-        result = versions_collection.insert_one(version)
+        result = await asyncio.to_thread(versions_collection.insert_one, version)
         version["_id"] = result.inserted_id
+        # Keep the denormalized counters in sync (score 1.0 counts as significant)
+        await asyncio.to_thread(
+            pages_collection.update_one,
+            {"_id": ObjectId(page_id)},
+            {"$inc": {"version_count": 1, "significant_version_count": 1}}
+        )
         return version
     except Exception as e:
         logger.error(f"Error creating page version for page {page_id}: {e}")
@@ -358,7 +376,7 @@ def get_page_versions(page_id: str, limit: int = 10):
 
 
 # ---------------- Change Logs ----------------
-def create_change_log(change_data: dict):
+async def create_change_log(change_data: dict):
     """Create a new change log entry"""
     if db is None:
         return None
@@ -367,16 +385,16 @@ def create_change_log(change_data: dict):
     
     # Handle ObjectId conversion
     if "page_id" in change_data_copy and isinstance(change_data_copy["page_id"], str):
-        change_data_copy["page_id"] = ObjectId(change_data_copy["page_id"])
+        change_data_copy["page_id"] = to_oid(change_data_copy["page_id"])
     if "user_id" in change_data_copy and isinstance(change_data_copy["user_id"], str):
-        change_data_copy["user_id"] = ObjectId(change_data_copy["user_id"])
+        change_data_copy["user_id"] = to_oid(change_data_copy["user_id"])
     
     # Ensure timestamp is set
     if "timestamp" not in change_data_copy:
         change_data_copy["timestamp"] = datetime.utcnow()
     
     try:
-        result = changes_collection.insert_one(change_data_copy)
+        result = await asyncio.to_thread(changes_collection.insert_one, change_data_copy)
         return str(result.inserted_id)
     except Exception as e:
         logger.error(f"Error creating change log: {e}")
@@ -402,15 +420,10 @@ def get_change_logs_for_user(user_id, limit: int = 20):
     
     # Handle both ObjectId and string user_id
     if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
-    
-    # ✅ CHECK: User must not be deleted
-    user = users_collection.find_one({
-        "_id": user_id,
-        "is_deleted": {"$ne": True}
-    })
+        user_id = to_oid(user_id)
     
-    if not user:
+    # ✅ CHECK: User must not be deleted (cached liveness check)
+    if not user_is_alive(user_id):
         return []  # User doesn't exist or is deleted
     
     try:
@@ -422,57 +435,82 @@ def get_change_logs_for_user(user_id, limit: int = 20):
 
 
 # ---------------- Additional utility functions for scheduler ----------------
-def get_all_active_pages():
+# Only the page fields the scheduler reads - keeps large/unused fields off the wire
+# Most pages pulled into a single check cycle; the rest stay due and are picked up next cycle
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "500"))
+
+_SCHEDULER_PAGE_FIELDS = {
+    "url": 1,
+    "display_name": 1,
+    "user_id": 1,
+    "last_checked": 1,
+    "check_interval_minutes": 1,
+    "versioning_config": 1,
+    "last_content_sha256": 1
+}
+
+
+async def get_all_active_pages():
     """Get all active pages across all users (for scheduler)"""
     if db is None:
         return []
     try:
-        pages = pages_collection.find({"is_active": True})
-        return list(pages)
+        return await asyncio.to_thread(
+            lambda: list(pages_collection.find({"is_active": True}, _SCHEDULER_PAGE_FIELDS))
+        )
     except Exception as e:
         logger.error(f"Error getting all active pages: {e}")
         return []
 
 
-def get_pages_due_for_check():
+async def get_pages_due_for_check():
     """Get pages that are due for checking based on their interval"""
     if db is None:
         return []
     try:
-        # Get pages that have never been checked or are due for checking
-        now = datetime.utcnow()
-        pages = pages_collection.find({
-            "is_active": True,
-            "$or": [
-                {"last_checked": None},
-                {"last_checked": {"$lte": now}}
-            ]
-        })
-        return list(pages)
+        # Get pages whose next_check_at has passed (or was never set) - one (is_active, next_check_at)
+        # index range scan, capped per cycle so a backlog is worked off oldest-first
+        return await asyncio.to_thread(lambda: list(
+            pages_collection.find(due_pages_query(datetime.utcnow()), _SCHEDULER_PAGE_FIELDS)
+            .sort("next_check_at", ASCENDING)
+            .limit(SCHEDULER_BATCH_SIZE)
+        ))
     except Exception as e:
         logger.error(f"Error getting pages due for check: {e}")
         return []
 
 
-def get_latest_page_version(page_id: str):
-    """Get the most recent version of a page (for scheduler comparison)"""
+async def get_latest_checksum(page_id: str) -> Optional[str]:
+    """Checksum of the newest stored version (covered by the latest_cksum_cov index - no document fetch)"""
     if db is None:
         return None
     try:
-        # Get the second-to-last version for comparison (skip the most recent)
-        versions = list(versions_collection.find(
+        latest = await asyncio.to_thread(
+            versions_collection.find_one,
             {"page_id": ObjectId(page_id)},
-            sort=[("timestamp", DESCENDING)],
-            limit=2
+            {"_id": 0, "checksum": 1, "content_hash": 1, "timestamp": 1},
+            sort=[("timestamp", DESCENDING)]
+        )
+        return latest.get("checksum") if latest else None
+    except Exception as e:
+        logger.error(f"Error getting latest checksum for {page_id}: {e}")
+        return None
+
+
+async def get_latest_page_version(page_id: str):
+    """Get the most recent version of a page (for scheduler comparison)"""
+    if db is None:
+        return None
+    try:
+        # Get the second-to-last version for comparison (skip the most recent) -
+        # only that one document is read; None if there are fewer than 2 versions
+        return await asyncio.to_thread(lambda: next(
+            versions_collection.find(
+                {"page_id": ObjectId(page_id)},
+                {"text_content": 1, "content_hash": 1, "checksum": 1, "timestamp": 1}
+            ).sort("timestamp", DESCENDING).skip(1).limit(1),
+            None
         ))
-        
-        # Return the previous version if we have at least 2 versions
-        if len(versions) > 1:
-            return versions[1]  # Second most recent
-        elif len(versions) == 1:
-            return None  # Only one version exists, no comparison possible
-        else:
-            return None  # No versions exist
     except Exception as e:
         logger.error(f"Error getting latest page version for {page_id}: {e}")
         return None
@@ -524,6 +562,116 @@ def safe_cleanup_old_audit_logs(days_to_keep: int = 90) -> int:
 # ---------------- MonitoringScheduler Class ----------------
 from .crawler import ContentFetcher
 
+# ✅ Plain-text change email, a str.format template built once at import
+_CHANGE_EMAIL_TEXT = """FreshLense Page Change Alert
+
+🚨 {change_severity} Change Detected
+
+📄 Page: {page_title}
+🔗 URL: {page_url}
+📊 Change Percentage: {change_percentage}%
+📏 Content Size: {old_length} → {new_length} characters
+🕐 Detected: {detected_at}
+
+The content of this monitored page has changed. 
+{change_severity} changes may require your review.
+
+🔍 View updated page: {page_url}
+📊 Run fact-check in FreshLense app
+
+You're receiving this email because you're monitoring this page with FreshLense.
+Manage notification preferences in your account settings."""
+
+# ✅ Change-notification email HTML, compiled once at import (autoescape keeps page titles/URLs safe).
+# The severity colour is emitted once, as classes in <style>, rather than repeated in inline styles.
+_CHANGE_EMAIL_TMPL = jinja2.Environment(autoescape=True).from_string("""
+<!DOCTYPE html>
+<html>
+<head>
+<style>.sev{color:{{ color }}}.sev-bg{background:linear-gradient(135deg,{{ color }} 0%,#7c3aed 100%)}</style>
+</head>
+<body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div class="sev-bg" style="padding: 30px; color: white; text-align: center; border-radius: 10px 10px 0 0;">
+        <h1 style="margin: 0; font-size: 24px;">🔄 {{ change_severity }} Change Detected</h1>
+        <p style="margin: 10px 0 0 0; opacity: 0.9;">A monitored page has been updated</p>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 25px; border-radius: 0 0 10px 10px;">
+        <!-- Page Info -->
+        <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+            <h3 style="margin-top: 0; color: #333;">{{ page_title }}</h3>
+            <p style="color: #666; margin-bottom: 5px;">
+                <strong>URL:</strong> <a href="{{ page_url }}" style="color: #3b82f6;">{{ page_url }}</a>
+            </p>
+            <p style="color: #666; margin: 0;">
+                <strong>Detected:</strong> {{ detected_at }}
+            </p>
+        </div>
+
+        <!-- Change Details -->
+        <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+            <h3 style="margin-top: 0; color: #333;">Change Analysis</h3>
+
+            <div style="text-align: center; margin: 25px 0;">
+                <div class="sev" style="font-size: 48px; font-weight: bold;">
+                    {{ change_percentage }}%
+                </div>
+                <p style="color: #666; margin-top: 10px;">
+                    Content Change Detected
+                </p>
+            </div>
+
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin: 20px 0;">
+                <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
+                    <div style="font-size: 20px; font-weight: bold; color: #0ea5e9;">
+                        {{ old_length }}
+                    </div>
+                    <div style="color: #666; font-size: 14px;">Previous Length</div>
+                </div>
+
+                <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
+                    <div style="font-size: 20px; font-weight: bold; color: #0ea5e9;">
+                        {{ new_length }}
+                    </div>
+                    <div style="color: #666; font-size: 14px;">New Length</div>
+                </div>
+            </div>
+
+            <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; text-align: center;">
+                <p style="margin: 0; color: #666; font-size: 14px;">
+                    <strong>Change Severity:</strong> <span class="sev" style="font-weight: bold;">{{ change_severity }}</span><br>
+                    {{ change_severity|lower }} changes may require your review
+                </p>
+            </div>
+        </div>
+
+        <!-- Action Buttons -->
+        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin-top: 20px;">
+            <a href="{{ page_url }}" 
+               style="display: block; background: #3b82f6; color: white; padding: 12px 20px; text-decoration: none; border-radius: 5px; font-weight: bold; text-align: center;"
+               target="_blank">
+                🔍 View Updated Page
+            </a>
+
+            <a href="#" 
+               style="display: block; background: #8b5cf6; color: white; padding: 12px 20px; text-decoration: none; border-radius: 5px; font-weight: bold; text-align: center;"
+               target="_blank">
+                📊 Run Fact-Check
+            </a>
+        </div>
+
+        <!-- Footer -->
+        <div style="margin-top: 25px; padding-top: 20px; border-top: 1px solid #e9ecef; text-align: center;">
+            <p style="color: #666; font-size: 12px; margin: 0;">
+                You're receiving this email because you're monitoring this page with FreshLense.<br>
+                <a href="#" style="color: #3b82f6; text-decoration: none;">Manage notification preferences</a>
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
 class MonitoringScheduler:
     """Background scheduler for monitoring webpage changes with smart versioning"""
     
@@ -539,25 +687,36 @@ class MonitoringScheduler:
         self.task: Optional[asyncio.Task] = None
         self._loop = None
         self.content_fetcher = ContentFetcher()  # Initialize the content fetcher
-        # ✅ FIXED: Create versioning service without database parameter
-        self.versioning_service = VersioningService()
-        # ✅ FIXED: Set collections after creating the service
-        # ✅ FIXED: Change from "if versions_collection and pages_collection:" to "if versions_collection is not None and pages_collection is not None:"
-        if versions_collection is not None and pages_collection is not None:
-            self.versioning_service.set_collections(versions_collection, pages_collection)
-        else:
+        # ✅ Dedicated crawl pool, so page fetches don't queue behind other blocking work in the default executor
+        self._fetch_workers = int(os.getenv("FETCH_WORKERS", "5"))
+        self._fetch_pool: Optional[ThreadPoolExecutor] = None
+        # ✅ Reuse the module-level versioning service (collections already set)
+        self.versioning_service = _versioning_service
+        if db is None:
             logger.warning("Database collections not available during scheduler initialization")
         
         # ✅ EMAIL CONFIGURATION
         self.email_enabled = os.getenv("EMAIL_ENABLED", "true").lower() == "true"
         if self.email_enabled:
-            resend.api_key = os.getenv("RESEND_API_KEY")
-            if not resend.api_key:
+            if not os.getenv("RESEND_API_KEY"):
                 logger.warning("EMAIL_ENABLED is true but RESEND_API_KEY is missing")
                 self.email_enabled = False
             else:
                 logger.info("✅ Email notifications enabled for scheduler")
         
+        # ✅ Page field updates collected during a check cycle, flushed in one bulk_write
+        self._pending_page_updates = {}  # page _id -> fields to $set
+        self._pending_changes = []  # change log documents, flushed with insert_many
+        
+        # ✅ Change emails are queued and sent by a separate notifier task, so a slow
+        # Resend call never holds a page-check semaphore slot
+        self._notify_queue: asyncio.Queue = asyncio.Queue(maxsize=int(os.getenv("NOTIFY_QUEUE_SIZE", "1000")))
+        self._notify_concurrency = int(os.getenv("NOTIFY_CONCURRENCY", "5"))
+        self._notifier_task: Optional[asyncio.Task] = None
+        self._notify_in_flight: set = set()  # _deliver tasks still sending
+        # On stop(), queued and in-flight emails get this long to go out before they're abandoned
+        self._notify_drain_seconds = float(os.getenv("NOTIFY_DRAIN_SECONDS", "10"))
+        
         # ✅ Cleanup configuration
         self.cleanup_interval_cycles = 10  # Run cleanup every 10 cycles (~10 minutes)
         self.cleanup_counter = 0
@@ -572,7 +731,9 @@ class MonitoringScheduler:
             
         self.running = True
         self._loop = asyncio.get_event_loop()
+        self._fetch_pool = ThreadPoolExecutor(max_workers=self._fetch_workers, thread_name_prefix="fetch")
         self.task = asyncio.create_task(self._run_scheduler())
+        self._notifier_task = asyncio.create_task(self._notifier_loop())
         logger.info("✅ Monitoring scheduler started with SMART VERSIONING")
         
     async def stop(self):
@@ -587,6 +748,28 @@ class MonitoringScheduler:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        
+        # ✅ No new changes are coming - let the notifier send what's queued (bounded), then wait for the
+        # sends in flight, so change emails aren't dropped and don't race close_clients()
+        try:
+            await asyncio.wait_for(self._notify_queue.join(), timeout=self._notify_drain_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping with {self._notify_queue.qsize()} change emails still queued")
+        if self._notifier_task:
+            self._notifier_task.cancel()
+            try:
+                await self._notifier_task
+            except asyncio.CancelledError:
+                pass
+        if self._notify_in_flight:
+            _, pending = await asyncio.wait(set(self._notify_in_flight), timeout=self._notify_drain_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        if self._fetch_pool:
+            self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+            self._fetch_pool = None
         logger.info("Monitoring scheduler stopped")
         
     async def _run_scheduler(self):
@@ -616,17 +799,14 @@ class MonitoringScheduler:
             logger.debug("🔄 Running safe cleanup tasks...")
             
             # 1. Clean expired MFA codes (SAFE - doesn't delete users)
-            mfa_cleaned = safe_cleanup_expired_mfa_codes()
+            mfa_cleaned = await asyncio.to_thread(safe_cleanup_expired_mfa_codes)
             if mfa_cleaned > 0:
                 logger.info(f"🔧 Cleaned {mfa_cleaned} expired MFA codes")
             
-            # 2. Clean old audit logs (optional, configurable)
-            audit_cleaned = safe_cleanup_old_audit_logs(days_to_keep=90)
-            if audit_cleaned > 0:
-                logger.info(f"🧹 Cleaned {audit_cleaned} old audit logs")
+            # 2. Old audit logs expire through the TTL index on audit_logs.timestamp - no sweep needed
             
             # 3. Get MFA cleanup stats for monitoring
-            stats = mfa_cleanup_service.get_mfa_cleanup_stats()
+            stats = await asyncio.to_thread(mfa_cleanup_service.get_mfa_cleanup_stats)
             if "stats" in stats:
                 expired_count = stats["stats"].get("users_with_expired_mfa_codes", 0)
                 if expired_count > 50:  # Alert threshold
@@ -641,7 +821,7 @@ class MonitoringScheduler:
         """Check all pages that are due for monitoring"""
         try:
             # Get pages due for checking
-            pages = self._get_pages_due_for_check()
+            pages = await self._get_pages_due_for_check()
             
             if not pages:
                 return
@@ -657,27 +837,39 @@ class MonitoringScheduler:
                 
         except Exception as e:
             logger.error(f"Error checking pages: {e}")
+        finally:
+            await self._flush_pending_writes()
+    
+    def _queue_page_update(self, page: dict, fields: dict):
+        """Stage $set fields for a page; merged per page and written at the end of the cycle"""
+        if "last_checked" in fields:
+            # Keep next_check_at in step so the due-pages query stays a plain index range scan
+            interval = page.get("check_interval_minutes") or 1440
+            fields = {**fields, "next_check_at": fields["last_checked"] + timedelta(minutes=interval)}
+        self._pending_page_updates.setdefault(page["_id"], {}).update(fields)
     
-    def _get_pages_due_for_check(self):
+    async def _flush_pending_writes(self):
+        """Write staged page updates (one bulk_write) and change logs (one insert_many), unordered"""
+        if self._pending_page_updates:
+            pending, self._pending_page_updates = self._pending_page_updates, {}
+            requests = [UpdateOne({"_id": page_id}, {"$set": fields}) for page_id, fields in pending.items()]
+            try:
+                await asyncio.to_thread(pages_collection.bulk_write, requests, ordered=False)
+            except Exception as e:
+                logger.error(f"Error flushing {len(requests)} page updates: {e}")
+        
+        if self._pending_changes:
+            changes, self._pending_changes = self._pending_changes, []
+            try:
+                await asyncio.to_thread(changes_collection.insert_many, changes, ordered=False)
+            except Exception as e:
+                logger.error(f"Error flushing {len(changes)} change logs: {e}")
+    
+    async def _get_pages_due_for_check(self):
         """Get pages that are actually due for checking based on their interval"""
         try:
-            all_active_pages = get_pages_due_for_check()
-            now = datetime.utcnow()
-            due_pages = []
-            
-            for page in all_active_pages:
-                last_checked = page.get("last_checked")
-                interval_minutes = page.get("check_interval_minutes", 1440)  # Default 24 hours
-                
-                # If never checked, or interval has passed
-                if not last_checked:
-                    due_pages.append(page)
-                else:
-                    next_check = last_checked + timedelta(minutes=interval_minutes)
-                    if now >= next_check:
-                        due_pages.append(page)
-            
-            return due_pages
+            # Interval filtering happens in the query itself
+            return await get_pages_due_for_check()
         except Exception as e:
             logger.error(f"Error getting pages due for check: {e}")
             return []
@@ -694,17 +886,30 @@ class MonitoringScheduler:
                 if not current_content:
                     logger.warning(f"Failed to fetch content for {url}")
                     # Still update last_checked even if fetch failed
-                    update_tracked_page(page_id, {"last_checked": datetime.utcnow()})
+                    self._queue_page_update(page, {"last_checked": datetime.utcnow()})
+                    return
+                
+                # ✅ Unchanged page (the common case): the hash stored on the page means no query or diff work at all
+                # Encode once - both hashes below (same algorithms as VersioningService) read these bytes
+                content_bytes = current_content.encode('utf-8')
+                content_sha256 = hashlib.sha256(content_bytes).hexdigest()
+                if content_sha256 == page.get("last_content_sha256"):
+                    logger.debug(f"ℹ️  No change for {url} - identical content hash")
+                    self._queue_page_update(page, {"last_checked": datetime.utcnow()})
+                    return
+                
+                # Pages without a stored hash yet fall back to the latest version's checksum
+                new_checksum = hashlib.md5(content_bytes).hexdigest()
+                if new_checksum == await get_latest_checksum(page_id):
+                    logger.debug(f"ℹ️  No change for {url} - identical checksum")
+                    self._queue_page_update(page, {
+                        "last_checked": datetime.utcnow(),
+                        "last_content_sha256": content_sha256
+                    })
                     return
                     
                 # Get page-specific versioning config
-                page_config = page.get("versioning_config", {
-                    "min_change_threshold": 0.05,  # 5% change required
-                    "require_significant_keywords": True,
-                    "max_versions_kept": 50,
-                    "check_structural_changes": True,
-                    "prune_strategy": "significant_only"
-                })
+                page_config = page.get("versioning_config", DEFAULT_VERSIONING_CONFIG)
                 
                 # ✅ FIXED: USE SMART VERSIONING with AWAIT
                 new_version_id = await self.versioning_service.save_version_if_significant(
@@ -716,8 +921,11 @@ class MonitoringScheduler:
                     generate_ai_summary=True  # Enable AI summaries
                 )
                 
-                # Update last_checked timestamp
-                update_tracked_page(page_id, {"last_checked": datetime.utcnow()})
+                # Update last_checked timestamp (and the hash, so this content isn't re-analysed next cycle)
+                self._queue_page_update(page, {
+                    "last_checked": datetime.utcnow(),
+                    "last_content_sha256": content_sha256
+                })
                 
                 # If no new version was saved (insignificant change)
                 if not new_version_id:
@@ -725,30 +933,32 @@ class MonitoringScheduler:
                     return
                 
                 # Get the new version to calculate metrics
-                new_version = versions_collection.find_one({"_id": ObjectId(new_version_id)})
+                new_version = await asyncio.to_thread(versions_collection.find_one, {"_id": ObjectId(new_version_id)})
                 if not new_version:
                     logger.error(f"Failed to retrieve new version {new_version_id}")
                     return
                 
                 # ✅ GET OLD VERSION FOR COMPARISON
-                old_version = get_latest_page_version(page_id)
+                old_version = await get_latest_page_version(page_id)
                 old_content = old_version.get("text_content", "") if old_version else ""
                 
                 # Calculate change percentage for notification
-                change_percentage = self._calculate_change_percentage(old_content, current_content)
+                change_percentage = await asyncio.to_thread(
+                    self._calculate_change_percentage, old_content, current_content,
+                    old_version.get("content_hash") if old_version else None, content_sha256
+                )
                 
                 # Update page with new version ID
-                update_data = {
-                    "current_version_id": new_version_id,
+                self._queue_page_update(page, {
+                    "current_version_id": ObjectId(new_version_id),
                     "last_change_detected": datetime.utcnow()
-                }
-                update_tracked_page(page_id, update_data)
+                })
                 
                 # ✅ SEND EMAIL NOTIFICATION IF ENABLED AND CHANGE IS SIGNIFICANT
                 if (self.email_enabled and change_percentage > 0 and 
                     new_version.get("change_significance_score", 0) >= page_config.get("min_change_threshold", 0.05)):
                     
-                    await self._send_change_notification(
+                    self._enqueue_notification(
                         page=page,
                         change_percentage=change_percentage,
                         new_version=new_version,
@@ -759,7 +969,7 @@ class MonitoringScheduler:
                 # Create change log entry
                 change_data = {
                     "user_id": page["user_id"],
-                    "page_id": page_id,
+                    "page_id": page["_id"],
                     "change_type": "content_changed",
                     "timestamp": datetime.utcnow(),
                     "details": {
@@ -773,12 +983,10 @@ class MonitoringScheduler:
                     }
                 }
                 
-                change_log_id = create_change_log(change_data)
-                if change_log_id:
-                    significance = new_version.get("change_significance_score", 0)
-                    logger.info(f"✅ Saved SIGNIFICANT version for {url}: {change_percentage}% change (score: {significance})")
-                else:
-                    logger.error(f"Failed to create change log for page {page_id}")
+                # Written with the rest of the cycle's change logs in one insert_many
+                self._pending_changes.append(change_data)
+                significance = new_version.get("change_significance_score", 0)
+                logger.info(f"✅ Saved SIGNIFICANT version for {url}: {change_percentage}% change (score: {significance})")
                     
             except Exception as e:
                 logger.error(f"Error checking page {page.get('url', 'unknown')}: {e}")
@@ -786,32 +994,24 @@ class MonitoringScheduler:
     # Keep old method for backward compatibility
     async def _check_single_page(self, page, semaphore):
         """Legacy method - calls new smart method"""
-        return await self._check_single_page_smart(page, semaphore)
+        try:
+            return await self._check_single_page_smart(page, semaphore)
+        finally:
+            await self._flush_pending_writes()
     
     # ✅ ADDED: UPDATE EXISTING PAGES CONFIG
-    def update_existing_pages_config(self):
+    async def update_existing_pages_config(self):
         """Update existing tracked pages with versioning configuration"""
+        if db is None:
+            return 0
         try:
-            all_pages = get_all_active_pages()
-            updated_count = 0
-            
-            for page in all_pages:
-                page_id = str(page["_id"])
-                
-                # Check if page already has versioning config
-                if "versioning_config" not in page:
-                    update_data = {
-                        "versioning_config": {
-                            "min_change_threshold": 0.05,
-                            "require_significant_keywords": True,
-                            "max_versions_kept": 50,
-                            "check_structural_changes": True,
-                            "prune_strategy": "significant_only"
-                        }
-                    }
-                    
-                    if update_tracked_page(page_id, update_data):
-                        updated_count += 1
+            # One conditional update_many instead of reading every page and writing the ones missing a config
+            result = await asyncio.to_thread(
+                pages_collection.update_many,
+                {"versioning_config": {"$exists": False}},
+                {"$set": {"versioning_config": DEFAULT_VERSIONING_CONFIG}}
+            )
+            updated_count = result.modified_count
             
             logger.info(f"✅ Updated {updated_count} pages with versioning configuration")
             return updated_count
@@ -826,25 +1026,27 @@ class MonitoringScheduler:
         try:
             logger.info("🧹 Starting cleanup of existing insignificant versions...")
             
-            all_pages = get_all_active_pages()
-            total_pruned = 0
+            all_pages = await get_all_active_pages()
             
-            for page in all_pages:
-                page_id = str(page["_id"])
-                
-                # Use default config
-                config = {
-                    "max_versions_kept": 50,
-                    "keep_significant_threshold": 0.3,
-                    "keep_time_based": True,
-                    "keep_oldest": True
-                }
-                
-                pruned = self.versioning_service.prune_old_versions(page_id, config)
-                total_pruned += pruned
-                
-                # Small delay to avoid overwhelming the database
-                await asyncio.sleep(0.1)
+            # Use default config
+            config = {
+                "max_versions_kept": 50,
+                "keep_significant_threshold": 0.3,
+                "keep_time_based": True,
+                "keep_oldest": True
+            }
+            
+            # Prune pages in parallel, bounded so Mongo isn't flooded
+            semaphore = asyncio.Semaphore(int(os.getenv("CLEANUP_CONCURRENCY", "10")))
+            
+            async def _prune(page):
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        self.versioning_service.prune_old_versions, str(page["_id"]), config
+                    )
+            
+            results = await asyncio.gather(*[_prune(page) for page in all_pages], return_exceptions=True)
+            total_pruned = sum(r for r in results if isinstance(r, int))
             
             logger.info(f"✅ Cleanup completed: {total_pruned} versions pruned")
             return total_pruned
@@ -854,8 +1056,9 @@ class MonitoringScheduler:
             return 0
     
     # ✅ ADDED: CALCULATE CHANGE PERCENTAGE
-    def _calculate_change_percentage(self, old_content: str, new_content: str) -> float:
-        """Calculate percentage of content changed"""
+    def _calculate_change_percentage(self, old_content: str, new_content: str,
+                                     old_hash: Optional[str] = None, new_hash: Optional[str] = None) -> float:
+        """Calculate percentage of content changed (memoized on the content hashes, which callers may pass in)"""
         try:
             if not old_content:
                 return 100.0  # First version is 100% change
@@ -863,22 +1066,98 @@ class MonitoringScheduler:
             if not new_content:
                 return 0.0
             
-            # Use difflib to calculate similarity
-            similarity = SequenceMatcher(None, old_content, new_content).ratio()
-            change_percentage = (1 - similarity) * 100
-            return round(change_percentage, 1)
+            # ✅ Cheap exits before any O(n*m) matching: identical content, or a change the lengths alone put
+            # in the "Major" band. Matching can pair up at most min(len) characters, so similarity is at most
+            # 2*min/(old+new); once one side is over 3x the other that bound is under 50%, whatever the diff says.
+            if old_content == new_content:
+                return 0.0
+            longest = max(len(old_content), len(new_content))
+            length_delta = abs(len(old_content) - len(new_content)) / longest
+            if length_delta > _MAJOR_LENGTH_DELTA:
+                return round(length_delta * 100, 1)
+            
+            # ✅ Same pair of contents seen before (re-checks, migrations, manual triggers) - reuse the result
+            key = (
+                old_hash or self.versioning_service.calculate_content_hash(old_content),
+                new_hash or self.versioning_service.calculate_content_hash(new_content)
+            )
+            with _change_pct_cache_lock:
+                cached = _change_pct_cache.get(key)
+            if cached is not None:
+                return cached
+            
+            if fuzz is not None:
+                change_percentage = 100.0 - fuzz.ratio(old_content, new_content)
+            else:
+                # Use difflib over word tokens (far shorter sequences than characters on large pages) -
+                # the O(n) upper bounds settle "Major" changes without ratio()
+                matcher = SequenceMatcher(None, old_content.split(), new_content.split())
+                similarity = matcher.real_quick_ratio()
+                if similarity >= _MAJOR_SIMILARITY:
+                    similarity = matcher.quick_ratio()
+                    if similarity >= _MAJOR_SIMILARITY:
+                        similarity = matcher.ratio()
+                change_percentage = (1 - similarity) * 100
+            change_percentage = round(change_percentage, 1)
+            with _change_pct_cache_lock:
+                _change_pct_cache[key] = change_percentage
+            return change_percentage
         except Exception as e:
             logger.error(f"Error calculating change percentage: {e}")
             return 0.0
     
+    def _enqueue_notification(self, **notification):
+        """Hand a change email to the notifier task (dropped with a warning if the queue is full)"""
+        try:
+            self._notify_queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            logger.warning(f"Notification queue full, dropping change email for page {notification['page'].get('_id')}")
+    
+    async def _notifier_loop(self):
+        """Drain the notification queue, sending up to NOTIFY_CONCURRENCY emails at once"""
+        semaphore = asyncio.Semaphore(self._notify_concurrency)
+        in_flight = self._notify_in_flight
+        
+        async def _deliver(notification):
+            try:
+                await self._send_change_notification(**notification)
+            finally:
+                semaphore.release()
+                self._notify_queue.task_done()
+        
+        while True:  # Runs until stop() cancels it, after the queue has been drained
+            # Take everything already queued (a cycle's worth of changes) and look its users up in one query
+            batch = [await self._notify_queue.get()]
+            while not self._notify_queue.empty() and len(batch) < 100:
+                batch.append(self._notify_queue.get_nowait())
+            user_ids = {notification["page"]["user_id"] for notification in batch}
+            users = await get_users_by_ids(user_ids) if len(batch) > 1 else None
+            prefetched = users is not None
+            users = users or {}
+            
+            for notification in batch:
+                user_id = notification["page"]["user_id"]
+                if isinstance(user_id, str):
+                    user_id = to_oid(user_id)
+                notification["user"] = users.get(user_id)
+                if prefetched and notification["user"] is None:
+                    # Deleted or opted out of email alerts - nothing to send
+                    self._notify_queue.task_done()
+                    continue
+                await semaphore.acquire()
+                task = asyncio.create_task(_deliver(notification))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+    
     # ✅ ADDED: SEND CHANGE NOTIFICATION
     async def _send_change_notification(self, page: dict, change_percentage: float, 
                                        new_version: dict, old_content_length: int, 
-                                       new_content_length: int):
-        """Send email notification when page change is detected"""
+                                       new_content_length: int, user: Optional[dict] = None):
+        """Send email notification when page change is detected (user may be prefetched by the caller)"""
         try:
             # Get user information
-            user = get_user_by_id(page["user_id"])
+            if user is None:
+                user = await get_user_by_id(page["user_id"])
             if not user or not user.get("email"):
                 logger.warning(f"No user or email found for page {page.get('_id')}")
                 return
@@ -894,18 +1173,12 @@ class MonitoringScheduler:
             page_url = page.get("url", "")
             
             # Determine change severity
-            if change_percentage > 50:
-                change_severity = "Major"
-                color = "#ef4444"  # Red
-            elif change_percentage > 20:
-                change_severity = "Moderate" 
-                color = "#f59e0b"  # Orange
-            else:
-                change_severity = "Minor"
-                color = "#10b981"  # Green
+            _, change_severity, color = next(band for band in _SEVERITY if change_percentage <= band[0])
             
             # Get from email
             from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
+            # One timestamp for both parts of the email
+            detected_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')
             
             # Create email
             params = {
@@ -919,7 +1192,8 @@ class MonitoringScheduler:
                     change_severity=change_severity,
                     color=color,
                     old_length=old_content_length,
-                    new_length=new_content_length
+                    new_length=new_content_length,
+                    detected_at=detected_at
                 ),
                 "text": self._generate_change_email_text(
                     page_title=page_title,
@@ -927,13 +1201,15 @@ class MonitoringScheduler:
                     change_percentage=change_percentage,
                     change_severity=change_severity,
                     old_length=old_content_length,
-                    new_length=new_content_length
+                    new_length=new_content_length,
+                    detected_at=detected_at
                 )
             }
             
-            # Send email
-            email = resend.Emails.send(params)
-            logger.info(f"✅ Change notification sent to {user_email} for {page_url} (ID: {email['id']})")
+            # Send email over the shared keep-alive Resend client (non-blocking, no per-send handshake)
+            response = await resend_http_client.post("/emails", json=params)
+            response.raise_for_status()
+            logger.info(f"✅ Change notification sent to {user_email} for {page_url} (ID: {response.json().get('id')})")
             return True
             
         except Exception as e:
@@ -943,124 +1219,42 @@ class MonitoringScheduler:
     # ✅ ADDED: GENERATE HTML EMAIL
     def _generate_change_email_html(self, page_title: str, page_url: str, 
                                    change_percentage: float, change_severity: str, 
-                                   color: str, old_length: int, new_length: int) -> str:
+                                   color: str, old_length: int, new_length: int,
+                                   detected_at: str) -> str:
         """Generate HTML email template for change notifications"""
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, {color} 0%, #7c3aed 100%); padding: 30px; color: white; text-align: center; border-radius: 10px 10px 0 0;">
-                <h1 style="margin: 0; font-size: 24px;">🔄 {change_severity} Change Detected</h1>
-                <p style="margin: 10px 0 0 0; opacity: 0.9;">A monitored page has been updated</p>
-            </div>
-            
-            <div style="background: #f8f9fa; padding: 25px; border-radius: 0 0 10px 10px;">
-                <!-- Page Info -->
-                <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                    <h3 style="margin-top: 0; color: #333;">{page_title}</h3>
-                    <p style="color: #666; margin-bottom: 5px;">
-                        <strong>URL:</strong> <a href="{page_url}" style="color: #3b82f6;">{page_url}</a>
-                    </p>
-                    <p style="color: #666; margin: 0;">
-                        <strong>Detected:</strong> {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}
-                    </p>
-                </div>
-                
-                <!-- Change Details -->
-                <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                    <h3 style="margin-top: 0; color: #333;">Change Analysis</h3>
-                    
-                    <div style="text-align: center; margin: 25px 0;">
-                        <div style="font-size: 48px; font-weight: bold; color: {color};">
-                            {change_percentage}%
-                        </div>
-                        <p style="color: #666; margin-top: 10px;">
-                            Content Change Detected
-                        </p>
-                    </div>
-                    
-                    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin: 20px 0;">
-                        <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
-                            <div style="font-size: 20px; font-weight: bold; color: #0ea5e9;">
-                                {old_length}
-                            </div>
-                            <div style="color: #666; font-size: 14px;">Previous Length</div>
-                        </div>
-                        
-                        <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
-                            <div style="font-size: 20px; font-weight: bold; color: #0ea5e9;">
-                                {new_length}
-                            </div>
-                            <div style="color: #666; font-size: 14px;">New Length</div>
-                        </div>
-                    </div>
-                    
-                    <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; text-align: center;">
-                        <p style="margin: 0; color: #666; font-size: 14px;">
-                            <strong>Change Severity:</strong> <span style="color: {color}; font-weight: bold;">{change_severity}</span><br>
-                            {change_severity.lower()} changes may require your review
-                        </p>
-                    </div>
-                </div>
-                
-                <!-- Action Buttons -->
-                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin-top: 20px;">
-                    <a href="{page_url}" 
-                       style="display: block; background: #3b82f6; color: white; padding: 12px 20px; text-decoration: none; border-radius: 5px; font-weight: bold; text-align: center;"
-                       target="_blank">
-                        🔍 View Updated Page
-                    </a>
-                    
-                    <a href="#" 
-                       style="display: block; background: #8b5cf6; color: white; padding: 12px 20px; text-decoration: none; border-radius: 5px; font-weight: bold; text-align: center;"
-                       target="_blank">
-                        📊 Run Fact-Check
-                    </a>
-                </div>
-                
-                <!-- Footer -->
-                <div style="margin-top: 25px; padding-top: 20px; border-top: 1px solid #e9ecef; text-align: center;">
-                    <p style="color: #666; font-size: 12px; margin: 0;">
-                        You're receiving this email because you're monitoring this page with FreshLense.<br>
-                        <a href="#" style="color: #3b82f6; text-decoration: none;">Manage notification preferences</a>
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        return _CHANGE_EMAIL_TMPL.render(
+            page_title=page_title,
+            page_url=page_url,
+            change_percentage=change_percentage,
+            change_severity=change_severity,
+            color=color,
+            old_length=old_length,
+            new_length=new_length,
+            detected_at=detected_at
+        )
     
     # ✅ ADDED: GENERATE PLAIN TEXT EMAIL
     def _generate_change_email_text(self, page_title: str, page_url: str, 
                                    change_percentage: float, change_severity: str,
-                                   old_length: int, new_length: int) -> str:
+                                   old_length: int, new_length: int, detected_at: str) -> str:
         """Generate plain text email for change notifications"""
-        return f"""FreshLense Page Change Alert
-
-🚨 {change_severity} Change Detected
-
-📄 Page: {page_title}
-🔗 URL: {page_url}
-📊 Change Percentage: {change_percentage}%
-📏 Content Size: {old_length} → {new_length} characters
-🕐 Detected: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}
-
-The content of this monitored page has changed. 
-{change_severity} changes may require your review.
-
-🔍 View updated page: {page_url}
-📊 Run fact-check in FreshLense app
-
-You're receiving this email because you're monitoring this page with FreshLense.
-Manage notification preferences in your account settings."""
+        return _CHANGE_EMAIL_TEXT.format(
+            page_title=page_title,
+            page_url=page_url,
+            change_percentage=change_percentage,
+            change_severity=change_severity,
+            old_length=old_length,
+            new_length=new_length,
+            detected_at=detected_at
+        )
                 
     async def _fetch_page_content(self, url: str) -> Optional[str]:
         """Fetch page content asynchronously using ContentFetcher"""
         try:
-            # Run the synchronous crawler in a thread pool
+            # Run the synchronous crawler in the scheduler's fetch pool
             loop = asyncio.get_event_loop()
             html, content = await loop.run_in_executor(
-                None, 
+                self._fetch_pool, 
                 self.content_fetcher.fetch_and_extract, 
                 url
             )
@@ -1100,7 +1294,7 @@ Manage notification preferences in your account settings."""
         logger.info("🚀 Starting versioning migration...")
         
         # 1. Update existing pages with versioning config
-        updated_pages = self.update_existing_pages_config()
+        updated_pages = await self.update_existing_pages_config()
         logger.info(f"✅ Updated {updated_pages} pages with versioning config")
         
         # 2. Clean up existing insignificant versions
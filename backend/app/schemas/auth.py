@@ -1,9 +1,12 @@
 # backend/app/schemas/auth.py
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional
 import re
 from datetime import datetime
 
+# Compiled once - every email validator below shares it
+_EMAIL_RE = re.compile(r'[^@]+@[^@]+\.[^@]+')
+
 # Existing schemas (keep these)
 class ForgotPasswordRequest(BaseModel):
     """Request schema for forgot password endpoint"""
@@ -13,7 +16,7 @@ class ForgotPasswordRequest(BaseModel):
     @classmethod
     def validate_email_format(cls, v):
         """Additional email validation"""
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v.lower().strip()  # Normalize email
 
@@ -80,7 +83,7 @@ class UserLogin(BaseModel):
     @classmethod
     def validate_email_format(cls, v):
         """Email validation"""
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v.lower().strip()
 
@@ -93,7 +96,7 @@ class UserCreate(BaseModel):
     @classmethod
     def validate_email_format(cls, v):
         """Email validation"""
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v.lower().strip()
     
@@ -127,7 +130,7 @@ class MFASetupRequest(BaseModel):
         """Email validation for MFA setup"""
         if v is None:  # mfa_email is optional, can be None
             return v
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v.lower().strip()
 
@@ -141,7 +144,7 @@ class MFAVerifyRequest(BaseModel):
     @classmethod
     def validate_email_format(cls, v):
         """Email validation"""
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v.lower().strip()
     
@@ -172,10 +175,30 @@ class MFASessionCheckRequest(BaseModel):
     @classmethod
     def validate_email_format(cls, v):
         """Email validation"""
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v.lower().strip()
 
+class EmailBody(BaseModel):
+    """Schema for endpoints that only take an email (send-mfa-code, disable-mfa)"""
+    model_config = ConfigDict(extra='ignore')
+    
+    email: EmailStr
+    
+    @field_validator('email')
+    @classmethod
+    def validate_email_format(cls, v):
+        """Email validation"""
+        if not _EMAIL_RE.match(v):
+            raise ValueError('Invalid email format')
+        return v.lower().strip()
+
+class TokenBody(BaseModel):
+    """Schema for token validation request"""
+    model_config = ConfigDict(extra='ignore')
+    
+    token: str = Field(..., min_length=20, description="JWT access token")
+
 class MFASessionCheckResponse(BaseModel):
     """Schema for MFA session check response"""
     mfa_required: bool
@@ -1,5 +1,5 @@
 # backend/app/schemas/diff.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -10,6 +10,8 @@ class ChangeType(str, Enum):
     MODIFIED = "modified"
 
 class ContentChange(BaseModel):
+    model_config = ConfigDict(frozen=True)  # built once per diff hunk, never mutated
+    
     change_type: ChangeType
     old_content: str
     new_content: str
@@ -34,6 +36,8 @@ class DiffRequest(BaseModel):
     new_version_id: str
 
 class DiffResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     page_id: str
     old_version_id: str
     new_version_id: str
@@ -66,6 +70,8 @@ class VersionComparison(BaseModel):
     
 class SideBySideLine(BaseModel):
     """Single line in side-by-side comparison"""
+    model_config = ConfigDict(frozen=True)
+    
     old_line: Optional[str] = None
     new_line: Optional[str] = None
     type: str  # "unchanged", "added", "removed", "modified"
@@ -94,10 +100,7 @@ class VersionInfo(BaseModel):
     # ✅ ADDED: AI summary indicator
     has_ai_summary: Optional[bool] = False
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
+    model_config = ConfigDict(frozen=True)
 
 # ✅ ADDED: Page information schema
 class PageInfo(BaseModel):
@@ -116,10 +119,7 @@ class PageInfo(BaseModel):
     last_change_detected: Optional[datetime] = None
     current_version_id: Optional[str] = None
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
+    model_config = ConfigDict(frozen=True)
 
 # ✅ ADDED: Response for /pages endpoint
 class PageListResponse(BaseModel):
@@ -144,11 +144,6 @@ class VersionDetailResponse(BaseModel):
     # ✅ ADDED: AI summary for version
     has_ai_summary: Optional[bool] = False
     ai_summary: Optional[Dict[str, Any]] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
 
 # ✅ ADDED: Change metrics schema
 class ChangeMetrics(BaseModel):
@@ -167,11 +162,6 @@ class PageUpdate(BaseModel):
     """Schema for updating page details"""
     display_name: Optional[str] = None
     check_interval_hours: Optional[int] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
 
 # ✅ ADDED: Page Create schema (if not existing)
 class PageCreate(BaseModel):
@@ -4,65 +4,392 @@ Audit logging service to track user operations for security and debugging.
 """
 
 from datetime import datetime, timedelta
+import atexit
+import glob
+import json
 import logging
-from typing import Optional, Dict, Any, List
-import traceback
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Iterator, List
+from bson import ObjectId
+from bson.errors import InvalidId
+from cachetools import TTLCache
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError, PyMongoError
 
 logger = logging.getLogger(__name__)
 
+# Background writers: each flushes its buffer every _FLUSH_SECONDS (sooner once _BATCH_SIZE entries are waiting),
+# _BATCH_SIZE entries per insert_many
+_QUEUE_SIZE = 10_000
+# Entries are sharded across this many buffers/writer threads by user_id, so each user's events stay in order
+_WRITER_COUNT = max(1, int(os.getenv("AUDIT_WRITERS", "4")))
+_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+_FLUSH_SECONDS = int(os.getenv("AUDIT_FLUSH_MS", "500")) / 1000
+# Failed writes (and anything logged while there's no database) are retried with backoff, then appended
+# here as JSON lines by the writer threads; they're replayed once MongoDB takes writes again
+_MAX_WRITE_ATTEMPTS = 5
+_SPILL_PATH = os.path.abspath(os.getenv(
+    "AUDIT_SPILL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "audit_spill.jsonl")
+))
+_SPILL_FSYNC_LINES = int(os.getenv("AUDIT_SPILL_FSYNC_LINES", "100"))
+# Past this size the spill file is rotated to <path>.1 (one generation kept, so at most twice this on disk)
+_SPILL_MAX_BYTES = int(os.getenv("AUDIT_SPILL_MAX_MB", "50")) * 1024 * 1024
+# While spilled entries are waiting, a replay is attempted at most this often
+_REPLAY_RETRY_SECONDS = 60
+
+# Security-relevant operations: echoed to the log and written with a journaled (w=1, j=True) write concern
+_SENSITIVE_OPS = frozenset({
+    "USER_DELETED", "USER_SOFT_DELETED", "LOGIN_FAILED", 
+    "PASSWORD_RESET", "MFA_DISABLED", "ACCOUNT_LOCKED",
+    "USER_CREATED", "USER_MODIFIED"
+})
+
+# Default get_audit_logs row: listing fields only, details truncated by the server
+_AUDIT_LIST_PROJECTION = {
+    "timestamp": 1,
+    "operation": 1,
+    "user_id": 1,
+    "performed_by": 1,
+    "ip_address": 1,
+    "details": {"$substrCP": [{"$ifNull": ["$details", ""]}, 0, 200]}
+}
+
+class _AuditBuffer:
+    """
+    Double buffer between log_event callers and one writer thread.
+    Producers append to the active list; the writer flips to the other list and flushes the
+    one it took outside the lock, so producers never wait on a MongoDB round trip.
+    """
+    
+    def __init__(self, maxsize: int):
+        self._bufs: List[List[Dict[str, Any]]] = [[], []]
+        self._active = 0
+        self._maxsize = maxsize
+        self._swap_lock = threading.Lock()
+        self._ready = threading.Event()  # set once a full batch is waiting
+        # Held for swap + write + clear, so the writer thread and flush() never interleave
+        self.write_lock = threading.Lock()
+    
+    def append(self, entry: Dict[str, Any]) -> bool:
+        """Add an entry to the active buffer; False if it's full"""
+        with self._swap_lock:
+            buf = self._bufs[self._active]
+            if len(buf) >= self._maxsize:
+                return False
+            buf.append(entry)
+            if len(buf) == _BATCH_SIZE:
+                self._ready.set()
+        return True
+    
+    def swap(self) -> List[Dict[str, Any]]:
+        """
+        Make the idle buffer active and return the one producers were filling.
+        The caller must clear() it (after writing) before the next swap (holding write_lock).
+        """
+        with self._swap_lock:
+            taken = self._bufs[self._active]
+            self._active ^= 1
+            self._ready.clear()
+        return taken
+    
+    def wait(self, timeout: float):
+        """Sleep until a full batch is waiting or the flush window passes"""
+        self._ready.wait(timeout)
+
 class AuditService:
     """Track all user-related operations for security and debugging"""
     
     def __init__(self, db=None):
         """Initialize with database connection"""
         self.db = db
+        self._logs_fast = self._logs_safe = None
+        # ✅ log_event only buffers; daemon threads batch entries into MongoDB off the request path
+        self._buffers: List[_AuditBuffer] = [
+            _AuditBuffer(maxsize=max(1, _QUEUE_SIZE // _WRITER_COUNT)) for _ in range(_WRITER_COUNT)
+        ]
+        self._writer_threads: List[threading.Thread] = []
+        self._writer_lock = threading.Lock()
+        # Spill file is opened once and shared by all writers
+        self._spill_file = None
+        self._spill_unsynced = 0
+        self._spill_lock = threading.Lock()
+        self._outage = False  # spilling since the last successful insert - logged once, not per batch
+        self._spill_pending = bool(self._spill_files())  # left over from an earlier run
+        self._next_replay = 0.0
+        # ✅ Dashboards poll the health report - a rolling multi-day stat can be a minute stale
+        self._health_cache = TTLCache(maxsize=32, ttl=60)
+        self._health_cache_lock = threading.Lock()
+        if db is not None:
+            self._bind_collections(db)
+            self._start_writer()
     
     def set_database(self, db):
         """Set database connection (can be called later)"""
+        if db is not None:
+            # Handles first: writers treat a non-None self.db as "collections are ready"
+            self._bind_collections(db)
+            self._next_replay = 0.0  # Replay anything spilled while there was no database right away
         self.db = db
+        if db is not None:
+            self._start_writer()
+    
+    def _bind_collections(self, db):
+        """Two audit_logs handles: unacknowledged for routine events, journaled for sensitive ones"""
+        self._logs_fast = db.audit_logs.with_options(write_concern=WriteConcern(w=0))
+        self._logs_safe = db.audit_logs.with_options(write_concern=WriteConcern(w=1, j=True))
+    
+    def _start_writer(self):
+        """Start one background writer thread per buffer, once per process"""
+        with self._writer_lock:
+            if self._writer_threads:
+                return
+            for i, buf in enumerate(self._buffers):
+                thread = threading.Thread(target=self._writer_loop, args=(buf,), name=f"audit-writer-{i}", daemon=True)
+                thread.start()
+                self._writer_threads.append(thread)
+            atexit.register(self.flush)
+    
+    def _buffer_for(self, user_id: str) -> _AuditBuffer:
+        """All of one user's entries go through the same buffer (and writer), preserving their order"""
+        return self._buffers[hash(user_id) % len(self._buffers)]
+    
+    def _drain(self, buf: _AuditBuffer):
+        """Swap out whatever the buffer holds and write it, _BATCH_SIZE entries per insert"""
+        with buf.write_lock:
+            batch = buf.swap()
+            try:
+                if batch and self.db is None:
+                    self._spill(batch)  # Replayed once set_database has been called
+                    return
+                for start in range(0, len(batch), _BATCH_SIZE):
+                    self._write_batch(batch[start:start + _BATCH_SIZE])
+            finally:
+                batch.clear()
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Insert a batch of audit entries; failures are logged, never raised"""
+        # No existence check - MongoDB creates audit_logs on first insert (indexes are built at startup)
+        safe = [entry for entry in batch if entry["operation"] in _SENSITIVE_OPS]
+        fast = [entry for entry in batch if entry["operation"] not in _SENSITIVE_OPS]
+        if safe:
+            self._insert(self._logs_safe, safe, bypass_document_validation=True)
+        if fast:
+            # Unacknowledged writes can't bypass validation
+            self._insert(self._logs_fast, fast)
+    
+    def _insert(self, collection, entries: List[Dict[str, Any]], **kwargs):
+        """
+        insert_many one group of entries, retrying what failed with exponential backoff.
+        Entries still unwritten after the last attempt are spilled to a local JSONL file.
+        """
+        for attempt in range(_MAX_WRITE_ATTEMPTS):
+            try:
+                collection.insert_many(entries, ordered=False, **kwargs)
+                self._mark_reachable()
+                return
+            except BulkWriteError as e:
+                # Unordered - everything else was written; retry only the failures (duplicates already landed)
+                failed = {
+                    error["index"] for error in e.details.get("writeErrors", [])
+                    if error.get("code") != 11000
+                }
+                entries = [entry for i, entry in enumerate(entries) if i in failed]
+                if not entries:
+                    return
+                logger.warning(f"⚠️  Audit logging: {len(entries)} entries failed to write (attempt {attempt + 1})")
+            except PyMongoError as e:  # AutoReconnect, timeouts, ...
+                logger.warning(f"⚠️  Audit logging failed for {len(entries)} entries (attempt {attempt + 1}): {e}")
+            except Exception as e:
+                # Not a transient driver error (e.g. an unencodable document) - retrying won't help
+                logger.error(f"⚠️  Audit logging failed for {len(entries)} entries: {e}")
+                break
+            if attempt + 1 < _MAX_WRITE_ATTEMPTS:
+                time.sleep(min(30, 0.1 * 2 ** attempt))
+        self._spill(entries)
+    
+    def _mark_reachable(self):
+        """An insert went through - end the outage and let the writers replay whatever was spilled"""
+        if self._outage:
+            with self._spill_lock:
+                if self._outage:
+                    self._outage = False
+                    self._next_replay = 0.0
+                    logger.info("✅ Audit logging: MongoDB is taking writes again")
+    
+    def _spill(self, entries: List[Dict[str, Any]]):
+        """Append entries MongoDB wouldn't take to the spill file, so no audit record is lost (writer threads only)"""
+        with self._spill_lock:
+            try:
+                for entry in entries:
+                    # A fixed _id makes replay idempotent - a re-sent entry is a duplicate key, not a second row
+                    entry.setdefault("_id", ObjectId())
+                if self._spill_file is None:
+                    self._spill_file = open(_SPILL_PATH, "a", buffering=8192, encoding="utf-8")
+                # One write per batch, so lines from other workers appending to the same file don't interleave
+                self._spill_file.write("".join(json.dumps(entry, default=str) + "\n" for entry in entries))
+                self._spill_file.flush()
+                self._spill_unsynced += len(entries)
+                if self._spill_unsynced >= _SPILL_FSYNC_LINES:
+                    self._sync_spill()
+                if self._spill_file.tell() >= _SPILL_MAX_BYTES:
+                    self._rotate_spill()
+                self._spill_pending = True
+                if not self._outage:
+                    self._outage = True
+                    self._next_replay = time.monotonic() + _REPLAY_RETRY_SECONDS
+                    logger.error(f"⚠️  Audit logging: MongoDB unavailable - spilling entries to {_SPILL_PATH}")
+            except OSError as e:
+                logger.error(f"⚠️  Audit logging: could not spill {len(entries)} entries: {e}")
+    
+    def _sync_spill(self):
+        """Push buffered spill lines to disk (caller holds _spill_lock)"""
+        if self._spill_file is not None:
+            self._spill_file.flush()
+            os.fsync(self._spill_file.fileno())
+        self._spill_unsynced = 0
+    
+    def _close_spill(self):
+        """Sync and close the spill file so it can be renamed (caller holds _spill_lock)"""
+        if self._spill_file is not None:
+            self._sync_spill()
+            self._spill_file.close()
+            self._spill_file = None
+    
+    def _rotate_spill(self):
+        """Cap the spill file: move it to <path>.1, dropping the previous generation (caller holds _spill_lock)"""
+        self._close_spill()
+        rotated = f"{_SPILL_PATH}.1"
+        if os.path.exists(rotated):
+            logger.error(f"⚠️  Audit logging: spill file over {_SPILL_MAX_BYTES} bytes again - discarding {rotated}")
+        os.replace(_SPILL_PATH, rotated)
+    
+    @staticmethod
+    def _spill_files() -> List[str]:
+        """Spill files waiting to be replayed, oldest first: rotated, current, then ones a failed replay kept"""
+        paths = [p for p in (f"{_SPILL_PATH}.1", _SPILL_PATH) if os.path.exists(p)]
+        return paths + sorted(glob.glob(f"{_SPILL_PATH}.replay-*"))
+    
+    def _replay_spill(self):
+        """
+        Insert spilled entries now that MongoDB takes writes again.
+        Each file is claimed with an atomic rename first, so two workers never replay the same one;
+        a claimed file is deleted once all its entries are in, otherwise it's retried later.
+        """
+        with self._spill_lock:
+            # During an outage this is a periodic probe - a successful replay ends the outage too
+            if time.monotonic() < self._next_replay:
+                return
+            self._spill_pending = False
+            try:
+                self._close_spill()
+            except OSError as e:
+                logger.error(f"⚠️  Audit logging: could not close {_SPILL_PATH}: {e}")
+            claimed = []
+            for path in self._spill_files():
+                target = f"{_SPILL_PATH}.replay-{os.getpid()}-{len(claimed)}-{time.time_ns()}"
+                try:
+                    os.replace(path, target)
+                    claimed.append(target)
+                except OSError:
+                    pass  # Another worker got there first
+        
+        for path in claimed:
+            try:
+                with open(path, encoding="utf-8") as spill:
+                    entries = []
+                    for line in spill:
+                        try:
+                            entries.append(self._from_spill(line))
+                        except (ValueError, KeyError, TypeError, InvalidId):
+                            logger.warning(f"⚠️  Audit logging: skipping unreadable line in {path}")
+                for start in range(0, len(entries), _BATCH_SIZE):
+                    try:
+                        self._logs_safe.insert_many(entries[start:start + _BATCH_SIZE], ordered=False)
+                    except BulkWriteError as e:
+                        # Entries that already landed come back as duplicate keys - those are fine
+                        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                            raise
+                os.remove(path)
+                self._mark_reachable()
+                logger.info(f"✅ Audit logging: replayed {len(entries)} spilled entries")
+            except (OSError, PyMongoError) as e:
+                logger.error(f"⚠️  Audit logging: could not replay {path}, keeping it: {e}")
+                with self._spill_lock:
+                    self._spill_pending = True
+                    self._next_replay = time.monotonic() + _REPLAY_RETRY_SECONDS
+                return
+    
+    @staticmethod
+    def _from_spill(line: str) -> Dict[str, Any]:
+        """Undo json.dumps(default=str) for the two non-JSON fields an entry can carry"""
+        entry = json.loads(line)
+        if "_id" in entry:
+            entry["_id"] = ObjectId(entry["_id"])
+        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])  # TTL index needs a real date
+        return entry
+    
+    def _writer_loop(self, buf: _AuditBuffer):
+        """Drain one buffer forever (daemon thread), replaying spilled entries once MongoDB is back"""
+        while True:
+            try:
+                buf.wait(_FLUSH_SECONDS)
+                self._drain(buf)
+                if self._spill_pending and self.db is not None:
+                    self._replay_spill()
+            except Exception:
+                # A dead writer would leave its shard to the synchronous fallback for good - keep going
+                logger.exception("⚠️  Audit writer error")
+    
+    def flush(self):
+        """Write out whatever is still buffered (registered with atexit)"""
+        for buf in self._buffers:
+            self._drain(buf)
+        with self._spill_lock:
+            try:
+                self._sync_spill()
+            except OSError as e:
+                logger.error(f"⚠️  Audit logging: could not sync {_SPILL_PATH}: {e}")
     
     def log_event(self, operation: str, user_id: str, 
                  performed_by: str = "system", details: str = "", 
                  ip_address: str = None, metadata: Dict = None) -> bool:
         """
         Log any audit event.
-        Returns True if logged successfully.
+        Returns True if logged successfully (False if there's no database yet - the entry is spilled to disk).
         """
-        if self.db is None:  # ✅ FIXED: Use "is None" instead of "not self.db"
-            logger.warning(f"AUDIT SKIPPED: {operation} - User: {user_id} (DB not available)")
-            return False
-        
         try:
-            # Ensure audit_logs collection exists
-            if "audit_logs" not in self.db.list_collection_names():
-                self.db.create_collection("audit_logs")
-            
             # Prepare audit log entry
             audit_log = {
-                "timestamp": datetime.utcnow(),
+                "timestamp": datetime.utcnow(),  # ISO form is derived from this on read
                 "operation": operation,
                 "user_id": str(user_id),  # Store as string
                 "performed_by": performed_by,
                 "details": details[:500],  # Limit details length
                 "ip_address": ip_address,
-                "metadata": metadata or {},
-                "server_timestamp": datetime.utcnow().isoformat()
+                "metadata": metadata or {}
             }
             
-            # Insert into audit logs
-            result = self.db.audit_logs.insert_one(audit_log)
+            if not self._writer_threads:
+                self._start_writer()
             
-            # Log sensitive operations to console for immediate visibility
-            sensitive_operations = [
-                "USER_DELETED", "USER_SOFT_DELETED", "LOGIN_FAILED", 
-                "PASSWORD_RESET", "MFA_DISABLED", "ACCOUNT_LOCKED",
-                "USER_CREATED", "USER_MODIFIED"
-            ]
+            # Hand off to the background writer (which spills it while there's no database);
+            # if it has fallen this far behind, write inline
+            if not self._buffer_for(audit_log["user_id"]).append(audit_log):
+                logger.warning("Audit buffer full - writing entry synchronously")
+                if self.db is None:  # ✅ FIXED: Use "is None" instead of "not self.db"
+                    self._spill([audit_log])
+                else:
+                    sensitive = operation in _SENSITIVE_OPS
+                    (self._logs_safe if sensitive else self._logs_fast).insert_one(audit_log)
             
-            if operation in sensitive_operations:
-                logger.info(f"🔍 AUDIT: {operation} - User: {user_id} - By: {performed_by}")
+            # Log sensitive operations to console for immediate visibility
+            if operation in _SENSITIVE_OPS:
+                logger.info("🔍 AUDIT: %s - User: %s - By: %s", operation, user_id, performed_by)
             
-            return result.inserted_id is not None
+            return self.db is not None
             
         except Exception as e:
             # Don't crash the application if audit logging fails
@@ -165,14 +492,24 @@ class AuditService:
     
     def get_audit_logs(self, user_id: str = None, operation: str = None, 
                       start_date: datetime = None, end_date: datetime = None,
-                      limit: int = 100) -> List[Dict[str, Any]]:
+                      limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Retrieve audit logs with filtering options.
         Useful for admin dashboard or debugging.
+        Returns the listing fields (details cut to 200 chars, no metadata) unless `fields` names others.
+        """
+        return list(self.iter_audit_logs(user_id, operation, start_date, end_date, limit, fields))
+    
+    def iter_audit_logs(self, user_id: str = None, operation: str = None, 
+                        start_date: datetime = None, end_date: datetime = None,
+                        limit: int = 100, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Same as get_audit_logs, but yields rows as the cursor delivers them (500 per batch)
+        so large result sets can be streamed without holding them all in memory.
         """
         if self.db is None:  # ✅ FIXED: Use "is None" instead of "not self.db"
             logger.error("Database connection not available")
-            return []
+            return
         
         try:
             query = {}
@@ -190,23 +527,22 @@ class AuditService:
                 else:
                     query["timestamp"] = {"$lte": end_date}
             
-            # Execute query
-            logs = self.db.audit_logs.find(query).sort("timestamp", -1).limit(limit)
-            logs_list = list(logs)
+            # Execute query - shaped server-side so metadata and long details don't cross the wire
+            projection = {f: 1 for f in fields} if fields else _AUDIT_LIST_PROJECTION
+            logs = self.db.audit_logs.find(query, projection).sort("timestamp", -1).limit(limit).batch_size(500)
             
             # Convert ObjectId to string and format dates
-            for log in logs_list:
-                if "_id" in log:
-                    log["id"] = str(log["_id"])
-                    del log["_id"]
-                if "timestamp" in log and isinstance(log["timestamp"], datetime):
-                    log["timestamp_iso"] = log["timestamp"].isoformat()
-            
-            return logs_list
+            with logs:
+                for log in logs:
+                    if "_id" in log:
+                        log["id"] = str(log["_id"])
+                        del log["_id"]
+                    if "timestamp" in log and isinstance(log["timestamp"], datetime):
+                        log["timestamp_iso"] = log["timestamp"].isoformat()
+                    yield log
             
         except Exception as e:
             logger.error(f"Error retrieving audit logs: {e}")
-            return []
     
     def get_user_activity_summary(self, user_id: str, days: int = 30) -> Dict[str, Any]:
         """
@@ -220,42 +556,47 @@ class AuditService:
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=days)
             
-            # Get logs for user in date range
-            logs = self.db.audit_logs.find({
-                "user_id": user_id,
-                "timestamp": {"$gte": start_date, "$lte": end_date}
-            })
-            
-            logs_list = list(logs)
-            
-            # Count operations by type
-            operation_counts = {}
-            for log in logs_list:
-                op = log.get("operation", "UNKNOWN")
-                operation_counts[op] = operation_counts.get(op, 0) + 1
-            
-            # Get unique days with activity
-            active_days = set()
-            for log in logs_list:
-                if "timestamp" in log:
-                    day = log["timestamp"].strftime("%Y-%m-%d")
-                    active_days.add(day)
+            # Counts, active days and the latest entries are worked out server-side -
+            # only the ten recent rows cross the wire
+            facets = next(self.db.audit_logs.aggregate([
+                {"$match": {"user_id": user_id, "timestamp": {"$gte": start_date, "$lte": end_date}}},
+                {"$facet": {
+                    "op_counts": [{"$group": {"_id": "$operation", "n": {"$sum": 1}}}],
+                    "active_days": [
+                        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}}},
+                        {"$count": "n"}
+                    ],
+                    "total": [{"$count": "n"}],
+                    "recent": [
+                        {"$sort": {"timestamp": -1}},
+                        {"$limit": 10},
+                        {"$project": {
+                            "_id": 0,
+                            "timestamp": 1,
+                            "operation": 1,
+                            "details": {"$substrCP": [{"$ifNull": ["$details", ""]}, 0, 100]}
+                        }}
+                    ]
+                }}
+            ]), {})
             
             return {
                 "user_id": user_id,
                 "period_days": days,
                 "start_date": start_date.isoformat(),
                 "end_date": end_date.isoformat(),
-                "total_events": len(logs_list),
-                "active_days": len(active_days),
-                "operation_counts": operation_counts,
+                "total_events": (facets.get("total") or [{}])[0].get("n", 0),
+                "active_days": (facets.get("active_days") or [{}])[0].get("n", 0),
+                "operation_counts": {
+                    (row["_id"] or "UNKNOWN"): row["n"] for row in facets.get("op_counts", [])
+                },
                 "recent_operations": [
                     {
                         "timestamp": log.get("timestamp").isoformat() if log.get("timestamp") else None,
                         "operation": log.get("operation"),
-                        "details": log.get("details", "")[:100]
+                        "details": log.get("details", "")
                     }
-                    for log in logs_list[:10]  # Last 10 operations
+                    for log in facets.get("recent", [])  # Last 10 operations
                 ]
             }
             
@@ -266,38 +607,41 @@ class AuditService:
     def get_system_health_report(self, days: int = 7) -> Dict[str, Any]:
         """
         Generate a system health report from audit logs.
-        Useful for monitoring and alerts.
+        Useful for monitoring and alerts. Reports are reused for up to a minute per `days` window.
         """
         if self.db is None:  # ✅ FIXED: Use "is None" instead of "not self.db"
             return {"error": "Database not available"}
         
+        with self._health_cache_lock:
+            cached = self._health_cache.get(days)
+        if cached is not None:
+            return cached
+        
         try:
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=days)
             
-            # Get failed login attempts
-            failed_logins = self.db.audit_logs.count_documents({
-                "operation": "LOGIN_FAILED",
-                "timestamp": {"$gte": start_date, "$lte": end_date}
-            })
-            
-            # Get successful logins
-            successful_logins = self.db.audit_logs.count_documents({
-                "operation": "LOGIN_SUCCESS",
-                "timestamp": {"$gte": start_date, "$lte": end_date}
-            })
+            # All four counts in one round trip over a single timestamp range scan
+            facets = next(self.db.audit_logs.aggregate([
+                {"$match": {"timestamp": {"$gte": start_date, "$lte": end_date}}},
+                {"$facet": {
+                    "failed": [{"$match": {"operation": "LOGIN_FAILED"}}, {"$count": "n"}],
+                    "success": [{"$match": {"operation": "LOGIN_SUCCESS"}}, {"$count": "n"}],
+                    "registered": [{"$match": {"operation": "USER_REGISTERED"}}, {"$count": "n"}],
+                    "security": [
+                        {"$match": {"operation": {"$in": ["USER_DELETION_ATTEMPT", "USER_SOFT_DELETED"]}}},
+                        {"$count": "n"}
+                    ]
+                }}
+            ]), {})
             
-            # Get user registrations
-            new_registrations = self.db.audit_logs.count_documents({
-                "operation": "USER_REGISTERED",
-                "timestamp": {"$gte": start_date, "$lte": end_date}
-            })
+            def _count(facet: str) -> int:
+                return (facets.get(facet) or [{}])[0].get("n", 0)
             
-            # Get security events
-            security_events = self.db.audit_logs.count_documents({
-                "operation": {"$in": ["USER_DELETION_ATTEMPT", "USER_SOFT_DELETED"]},
-                "timestamp": {"$gte": start_date, "$lte": end_date}
-            })
+            failed_logins = _count("failed")
+            successful_logins = _count("success")
+            new_registrations = _count("registered")
+            security_events = _count("security")
             
             # Calculate login success rate
             total_logins = failed_logins + successful_logins
@@ -305,7 +649,7 @@ class AuditService:
             if total_logins > 0:
                 login_success_rate = round((successful_logins / total_logins) * 100, 1)
             
-            return {
+            report = {
                 "report_period_days": days,
                 "start_date": start_date.isoformat(),
                 "end_date": end_date.isoformat(),
@@ -322,6 +666,9 @@ class AuditService:
                     failed_logins, login_success_rate, security_events
                 )
             }
+            with self._health_cache_lock:
+                self._health_cache[days] = report
+            return report
             
         except Exception as e:
             logger.error(f"Error generating system health report: {e}")
@@ -5,6 +5,36 @@ from typing import List, Tuple, Dict, Any, Optional
 from html import escape
 from ..schemas.diff import ContentChange, ChangeType
 
+# Optional C++ diff (Myers-style LCS, no autojunk heuristics); difflib is the fallback when rapidfuzz isn't installed
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
+
+def _opcodes(a, b) -> List[Tuple[str, int, int, int, int]]:
+    """SequenceMatcher.get_opcodes()-compatible opcodes for two strings or lists of lines/words"""
+    if Indel is None:
+        return difflib.SequenceMatcher(None, a, b).get_opcodes()
+    
+    # Indel only deletes and inserts - fold each adjacent delete/insert run into one 'replace', as difflib reports it
+    opcodes = []
+    for tag, i1, i2, j1, j2 in Indel.opcodes(a, b).as_list():
+        if tag != 'equal' and opcodes and opcodes[-1][0] != 'equal':
+            _, prev_i1, _, prev_j1, _ = opcodes[-1]
+            opcodes[-1] = ('replace', prev_i1, i2, prev_j1, j2)
+        else:
+            opcodes.append((tag, i1, i2, j1, j2))
+    return opcodes
+
+
+def _similarity(a: str, b: str) -> float:
+    """Same measure as SequenceMatcher.ratio(): 2 * matched / total length"""
+    if Indel is None:
+        return difflib.SequenceMatcher(None, a, b).ratio()
+    return Indel.normalized_similarity(a, b)
+
+
 class DiffService:
     def compare_text(self, old_text: str, new_text: str) -> List[ContentChange]:
         """Compare two text versions and return changes with proper highlighting"""
@@ -45,10 +75,8 @@ class DiffService:
         old_lines = old_text.splitlines(keepends=True)  # Keep line endings
         new_lines = new_text.splitlines(keepends=True)
         
-        # Use difflib for line-level comparison
-        differ = difflib.SequenceMatcher(None, old_lines, new_lines)
-        
-        for tag, i1, i2, j1, j2 in differ.get_opcodes():
+        # Line-level comparison
+        for tag, i1, i2, j1, j2 in _opcodes(old_lines, new_lines):
             old_chunk = old_lines[i1:i2]
             new_chunk = new_lines[j1:j2]
             
@@ -121,13 +149,11 @@ class DiffService:
         old_words = re.findall(r'\S+|\s+', old_text)  # Keep whitespace
         new_words = re.findall(r'\S+|\s+', new_text)
         
-        # Compare word sequences
-        differ = difflib.SequenceMatcher(None, old_words, new_words)
-        
         highlighted_old_words = []
         highlighted_new_words = []
         
-        for tag, i1, i2, j1, j2 in differ.get_opcodes():
+        # Compare word sequences
+        for tag, i1, i2, j1, j2 in _opcodes(old_words, new_words):
             if tag == 'equal':
                 highlighted_old_words.extend(old_words[i1:i2])
                 highlighted_new_words.extend(new_words[j1:j2])
@@ -343,28 +369,24 @@ class DiffService:
         words_new = new_text.split()
         
         # Character-level similarity
-        char_similarity = difflib.SequenceMatcher(None, old_text, new_text).ratio()
+        char_similarity = _similarity(old_text, new_text)
         
         # Line-level changes
         old_lines = old_text.splitlines()
         new_lines = new_text.splitlines()
         
         # Word-level changes (more accurate than set difference)
-        word_differ = difflib.SequenceMatcher(None, words_old, words_new)
-        
         # FIXED: Calculate total changed words (removed + added)
         word_changes = 0
-        for tag, i1, i2, j1, j2 in word_differ.get_opcodes():
+        for tag, i1, i2, j1, j2 in _opcodes(words_old, words_new):
             if tag != 'equal':
                 # Words removed from old + words added to new
                 word_changes += (i2 - i1) + (j2 - j1)
         
         # Line-level structural changes
-        line_differ = difflib.SequenceMatcher(None, old_lines, new_lines)
-        
         # FIXED: Calculate total changed lines (removed + added)
         line_changes = 0
-        for tag, i1, i2, j1, j2 in line_differ.get_opcodes():
+        for tag, i1, i2, j1, j2 in _opcodes(old_lines, new_lines):
             if tag != 'equal':
                 # Lines removed from old + lines added to new
                 line_changes += (i2 - i1) + (j2 - j1)
@@ -589,10 +611,9 @@ class DiffService:
         old_lines = old_text.splitlines(keepends=True)
         new_lines = new_text.splitlines(keepends=True)
         
-        differ = difflib.SequenceMatcher(None, old_lines, new_lines)
         side_by_side = []
         
-        for tag, i1, i2, j1, j2 in differ.get_opcodes():
+        for tag, i1, i2, j1, j2 in _opcodes(old_lines, new_lines):
             if tag == 'equal':
                 for i in range(i1, i2):
                     side_by_side.append({
@@ -35,7 +35,7 @@ class MFACleanupService:
                 {
                     "mfa_code": {"$ne": None},
                     "mfa_code_expires": {"$lt": datetime.utcnow()},
-                    "is_deleted": {"$ne": True}  # Only clean active users
+                    "is_deleted": False  # Only clean active users
                 },
                 {
                     "$set": {
@@ -85,7 +85,7 @@ class MFACleanupService:
                     "_id": user_id,
                     "mfa_code": {"$ne": None},
                     "mfa_code_expires": {"$lt": datetime.utcnow()},
-                    "is_deleted": {"$ne": True}
+                    "is_deleted": False
                 },
                 {
                     "$set": {
@@ -127,7 +127,7 @@ class MFACleanupService:
                 {
                     "mfa_code": {"$ne": None},
                     "mfa_code_expires": {"$lt": datetime.utcnow()},
-                    "is_deleted": {"$ne": True}
+                    "is_deleted": False
                 },
                 {
                     "email": 1,
@@ -164,33 +164,33 @@ class MFACleanupService:
             # Count users with active MFA codes
             total_with_mfa = self.db.users.count_documents({
                 "mfa_code": {"$ne": None},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             })
             
             # Count users with expired MFA codes
             expired_mfa = self.db.users.count_documents({
                 "mfa_code": {"$ne": None},
                 "mfa_code_expires": {"$lt": datetime.utcnow()},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             })
             
             # Count users with valid MFA codes
             valid_mfa = self.db.users.count_documents({
                 "mfa_code": {"$ne": None},
                 "mfa_code_expires": {"$gte": datetime.utcnow()},
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             })
             
             # Get MFA coverage
             total_active_users = self.db.users.count_documents({
-                "is_deleted": {"$ne": True}
+                "is_deleted": False
             })
             
             mfa_coverage = 0
             if total_active_users > 0:
                 users_with_mfa_enabled = self.db.users.count_documents({
                     "mfa_enabled": True,
-                    "is_deleted": {"$ne": True}
+                    "is_deleted": False
                 })
                 mfa_coverage = round((users_with_mfa_enabled / total_active_users) * 100, 1)
             
@@ -50,6 +50,7 @@ class PageService:
             
             if page_update.check_interval_hours is not None:
                 update_data["check_interval_minutes"] = page_update.check_interval_hours * 60
+                update_data["next_check_at"] = None  # due now, so the scheduler re-plans on the new interval
             
             # Add updated timestamp
             update_data["updated_at"] = datetime.utcnow()
@@ -1,21 +1,18 @@
 # backend/app/services/versioning_service.py
+import asyncio
 import hashlib
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from bson import ObjectId
 import logging
-import sys
-import os
 
 # Import AI service
 from .ai_service import ai_service
+from ..database import invalidate_pages_cache, adjust_page_version_counts
 
-# Import collections directly from database
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-# Try to import database collections
+# Try to import database collections (shares the pooled client from clients.py)
 try:
-    from database import versions_collection, pages_collection, change_logs_collection
+    from ..database import versions_collection, pages_collection, change_logs_collection
     print("✅ Successfully imported database collections for versioning service")
 except ImportError as e:
     print(f"⚠️ Could not import database collections: {e}")
@@ -215,14 +212,15 @@ class VersioningService:
             return None
         
         try:
-            # Get page details
-            page = pages_collection.find_one({"_id": ObjectId(page_id)})
+            # Get page details (blocking pymongo/difflib work runs off the event loop)
+            page = await asyncio.to_thread(pages_collection.find_one, {"_id": ObjectId(page_id)})
             if not page:
                 logger.error(f"Page {page_id} not found")
                 return None
             
             # Get the latest version
-            latest_version = versions_collection.find_one(
+            latest_version = await asyncio.to_thread(
+                versions_collection.find_one,
                 {"page_id": ObjectId(page_id)},
                 sort=[("timestamp", -1)]
             )
@@ -230,11 +228,12 @@ class VersioningService:
             old_content = latest_version.get("text_content", "") if latest_version else ""
             
             # Analyze change significance
-            analysis = self.analyze_change_significance(old_content, new_content, config)
+            analysis = await asyncio.to_thread(self.analyze_change_significance, old_content, new_content, config)
             
             if not analysis["store"]:
                 # Update last_checked timestamp but don't create new version
-                pages_collection.update_one(
+                await asyncio.to_thread(
+                    pages_collection.update_one,
                     {"_id": ObjectId(page_id)},
                     {"$set": {"last_checked": datetime.utcnow()}}
                 )
@@ -261,20 +260,27 @@ class VersioningService:
             }
             
             # Insert the new version
-            result = versions_collection.insert_one(version_data)
+            result = await asyncio.to_thread(versions_collection.insert_one, version_data)
             version_id = str(result.inserted_id)
             
-            # Update page with latest version reference
-            pages_collection.update_one(
+            # Update page with latest version reference and denormalized version counters
+            await asyncio.to_thread(
+                pages_collection.update_one,
                 {"_id": ObjectId(page_id)},
                 {
                     "$set": {
                         "last_checked": datetime.utcnow(),
                         "last_change_detected": datetime.utcnow(),
-                        "current_version_id": result.inserted_id
+                        "current_version_id": result.inserted_id,
+                        "last_content_sha256": analysis["hash"]
+                    },
+                    "$inc": {
+                        "version_count": 1,
+                        "significant_version_count": 1 if analysis["score"] >= 0.3 else 0
                     }
                 }
             )
+            invalidate_pages_cache()
             
             logger.info(f"✅ Saved version {version_id} for page {page_id} - {analysis['reason']} (score: {analysis['score']})")
             
@@ -290,7 +296,8 @@ class VersioningService:
                     )
                     
                     # Add summary to version
-                    versions_collection.update_one(
+                    await asyncio.to_thread(
+                        versions_collection.update_one,
                         {"_id": result.inserted_id},
                         {"$set": {"ai_summary": ai_summary}}
                     )
@@ -302,10 +309,10 @@ class VersioningService:
             
             # Create change log if user_id provided
             if user_id:
-                self.create_change_log(page_id, user_id, analysis["score"])
+                await asyncio.to_thread(self.create_change_log, page_id, user_id, analysis["score"])
             
             # Prune old versions if needed
-            self.prune_old_versions(page_id, config)
+            await asyncio.to_thread(self.prune_old_versions, page_id, config)
             
             return version_id
             
@@ -405,14 +412,19 @@ class VersioningService:
             
             # Delete old versions
             deleted_count = 0
+            significant_deleted = 0
             for version in all_versions:
                 version_id = str(version["_id"])
                 if version_id not in versions_to_keep:
                     result = versions_collection.delete_one({"_id": version["_id"]})
                     if result.deleted_count > 0:
                         deleted_count += 1
+                        if version.get("change_significance_score", 0) >= 0.3:
+                            significant_deleted += 1
             
             if deleted_count > 0:
+                adjust_page_version_counts(page_id, -deleted_count, -significant_deleted)
+                invalidate_pages_cache()
                 logger.info(f"🧹 Pruned {deleted_count} old versions for page {page_id}")
             
             return deleted_count
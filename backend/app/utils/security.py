@@ -4,11 +4,19 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import jwt
 from passlib.context import CryptContext
+import asyncio
 import os
 from dotenv import load_dotenv
 import logging
 from bson import ObjectId
 import bcrypt
+import base64
+import json
+import threading
+import time
+from cachetools import TTLCache
+
+from ..config import BCRYPT_COST
 
 load_dotenv()
 
@@ -41,7 +49,7 @@ except Exception as e:
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12,  # Explicitly set rounds
+    bcrypt__rounds=BCRYPT_COST,  # BCRYPT_COST env var, default 12
     bcrypt__ident="2b"  # Use bcrypt version 2b
 )
 
@@ -114,6 +122,14 @@ def get_password_hash(password: str) -> str:
         # Re-raise as ValueError with more context
         raise ValueError(f"Failed to hash password: {str(e)}")
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in a worker thread - bcrypt is CPU-bound and would stall the event loop"""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in a worker thread"""
+    return await asyncio.to_thread(get_password_hash, password)
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -162,18 +178,46 @@ def get_user_id_from_token(token: str) -> Optional[str]:
         return payload.get("sub")  # Assuming "sub" contains user email/ID
     return None
 
-# ✅ ADDED: Function to check token expiry without decoding
-def is_token_valid(token: str) -> bool:
-    """Check if token is valid and not expired"""
+# ✅ ADDED: Tokens whose signature has already been verified (expiry is still checked on every call)
+_verified_tokens = TTLCache(maxsize=4096, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_verified_tokens_lock = threading.Lock()
+
+def check_exp_fast(token: str) -> bool:
+    """Check only the exp claim by decoding the payload segment (no signature math)"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": True})
-        return True
+        payload_b64 = token.split('.', 2)[1]
+        payload = json.loads(base64.urlsafe_b64decode(payload_b64 + '=' * (-len(payload_b64) % 4)))
+        return payload['exp'] > time.time()
+    except (IndexError, KeyError, TypeError, ValueError):
+        return False
+
+def _verify_signature(token: str) -> bool:
+    """Full JWT verification; successful tokens are cached so the signature is checked once"""
+    try:
+        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": True})
     except jwt.ExpiredSignatureError:
-        logger.debug(f"Token expired")
+        logger.debug("Token expired")
         return False
     except jwt.InvalidTokenError:
-        logger.debug(f"Invalid token")
+        logger.debug("Invalid token")
+        return False
+    
+    with _verified_tokens_lock:
+        _verified_tokens[token] = True
+    return True
+
+# ✅ ADDED: Function to check token expiry without decoding
+def is_token_valid(token: str) -> bool:
+    """Check if token is valid and not expired"""
+    if not check_exp_fast(token):
+        logger.debug("Token expired or malformed")
         return False
+    
+    with _verified_tokens_lock:
+        if token in _verified_tokens:
+            return True
+    
+    return _verify_signature(token)
 
 # ✅ ADDED: Function to get token expiry info - FIXED with UTC timezone
 def get_token_expiry_info(token: str) -> Dict[str, Any]:
@@ -302,12 +346,33 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         logger.warning(f"Falling back to dictionary for user: {email}")
         return user_dict
 
+# ✅ ADDED: Batched entropy for URL-safe tokens (one os.urandom call per 128 tokens)
+class EntropyPool:
+    """Hand out random bytes from a pre-fetched os.urandom buffer"""
+    
+    def __init__(self, chunk_size: int = 4096):
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.lock = threading.Lock()
+    
+    def take(self, n: int = 32) -> str:
+        """Return a URL-safe token built from n random bytes (same format as secrets.token_urlsafe)"""
+        with self.lock:
+            if len(self.buf) < n:
+                self.buf = os.urandom(max(self.chunk_size, n))
+            out, self.buf = self.buf[:n], self.buf[n:]
+        return base64.urlsafe_b64encode(out).rstrip(b"=").decode("ascii")
+
+entropy_pool = EntropyPool()
+
 # Optional: Token blacklist for logout functionality (if needed)
 token_blacklist = set()
 
 def blacklist_token(token: str) -> None:
     """Add token to blacklist (for logout)"""
     token_blacklist.add(token)
+    with _verified_tokens_lock:
+        _verified_tokens.pop(token, None)
 
 def is_token_blacklisted(token: str) -> bool:
     """Check if token is blacklisted"""